@@ -0,0 +1,263 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from functools import wraps
+
+# Headless: SDL's dummy drivers need no display or sound card
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+import bird
+
+# Scripted, seeded scenarios that run the real Simulation and Renderer and
+# time each subsystem. Results can be saved as JSON and compared against a
+# stored baseline:
+#
+#   python bench.py --output baseline.json
+#   python bench.py --baseline baseline.json
+
+SEED = 1234
+
+
+class Timings:
+    def __init__(self):
+        self.totals = defaultdict(float)
+
+    def wrap(self, name, func):
+        totals = self.totals
+        clock = time.perf_counter
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                totals[name] += clock() - start
+        return timed
+
+
+# (owner, attribute, subsystem name) for every timed call site
+TIMED = [
+    (bird.WeatherSystem, 'update', 'weather.update'),
+    (bird.WeatherSystem, 'draw', 'weather.draw'),
+    (bird, 'draw_background', 'draw_background'),
+    (bird.Pipe, 'draw', 'pipe.draw'),
+    (bird.PowerUp, 'draw', 'power_up.draw'),
+    (bird.Bird, 'draw', 'bird.draw'),
+    (bird.ParticlePool, 'update', 'particles.update'),
+    (bird.ParticlePool, 'draw', 'particles.draw'),
+    (bird.Renderer, 'draw_hud', 'hud'),
+    (bird.Simulation, 'step', 'sim.step'),
+]
+
+
+def install(timings):
+    originals = []
+    for owner, attribute, name in TIMED:
+        func = getattr(owner, attribute)
+        originals.append((owner, attribute, func))
+        setattr(owner, attribute, timings.wrap(name, func))
+    return originals
+
+
+def uninstall(originals):
+    for owner, attribute, func in originals:
+        setattr(owner, attribute, func)
+
+
+def follow_gap(sim):
+    # Flap when falling below the middle of the next gap
+    b = sim.bird
+    ahead = [pipe for pipe in sim.pipes if pipe.x + bird.PIPE_WIDTH > b.x - 20]
+    target = ahead[0].height + bird.PIPE_GAP - 40 if ahead else bird.HEIGHT / 2
+    return b.y > target and b.velocity >= 0
+
+
+def keep_alive(sim, renderer, frame):
+    # Long scenarios should not end early. The shield covers pipes; the
+    # ceiling and the ground still kill, so the bird is also kept a step's
+    # worth of its top speed away from them.
+    b = sim.bird
+    b.shield_time = max(b.shield_time, 2)
+    speed = abs(bird.JUMP_STRENGTH)
+    b.velocity = max(-speed, min(speed, b.velocity))
+    b.y = max(2 * speed - b.size, min(bird.HEIGHT - bird.GROUND_HEIGHT - b.size - 2 * speed, b.y))
+
+
+def weather(kind, intensity):
+    def setup(sim, renderer):
+        sim.weather.set_weather(kind, intensity)
+        sim.weather_timer = -10 ** 9
+    return setup
+
+
+def star_chain(sim, renderer, frame):
+    keep_alive(sim, renderer, frame)
+    if frame % 3 == 0:
+        x = 150 + frame * 7 % 300
+        renderer.handle_event(('star', 5, x, 300 + frame * 13 % 200))
+
+
+def many_pipes(sim, renderer, frame):
+    keep_alive(sim, renderer, frame)
+    if frame % 20 == 0:
+        sim.pipes.append(bird.Pipe(bird.WIDTH, sim.rng))
+
+
+def end_game(sim, renderer):
+    sim.end_game()
+
+
+SCENARIOS = {
+    'clear': {'tick': keep_alive},
+    'rain_max': {'setup': weather('rain', 10.0), 'tick': keep_alive},
+    'snow_max': {'setup': weather('snow', 10.0), 'tick': keep_alive},
+    'fog_max': {'setup': weather('fog', 10.0), 'tick': keep_alive},
+    'star_chain': {'tick': star_chain},
+    'many_pipes': {'tick': many_pipes},
+    'game_over': {'setup': end_game, 'game_over': True},
+}
+
+
+def run_scenario(name, frames, screen, game_state, quality=0):
+    scenario = SCENARIOS[name]
+    sim = bird.Simulation(SEED)
+    renderer = bird.Renderer(screen)
+    renderer.set_quality(quality)
+    renderer.reset(SEED)
+    if 'setup' in scenario:
+        scenario['setup'](sim, renderer)
+    tick = scenario.get('tick')
+
+    timings = Timings()
+    originals = install(timings)
+    frame_times = []
+    try:
+        for frame in range(frames):
+            start = time.perf_counter()
+            if tick:
+                tick(sim, renderer, frame)
+            if not sim.game_over:
+                for event in sim.step(follow_gap(sim)):
+                    renderer.handle_event(event)
+                renderer.update(sim)
+                if sim.game_over and not scenario.get('game_over'):
+                    # The rest would time the game-over screen, not the scenario
+                    raise RuntimeError(f'scenario {name} reached game over at frame {frame}')
+            renderer.draw(sim, game_state)
+            pygame.display.flip()
+            frame_times.append(time.perf_counter() - start)
+    finally:
+        uninstall(originals)
+
+    frame_times.sort()
+    result = {
+        'frame_ms': 1000 * sum(frame_times) / frames,
+        'frame_p95_ms': 1000 * frame_times[int(frames * 0.95)],
+    }
+    for subsystem, total in sorted(timings.totals.items()):
+        result[f'{subsystem}_ms'] = 1000 * total / frames
+    return result
+
+
+def run_simulation(steps):
+    # Pure rules throughput, no rendering at all
+    sim = bird.Simulation(SEED)
+    start = time.perf_counter()
+    for _ in range(steps):
+        sim.step(follow_gap(sim))
+        if sim.game_over:
+            sim.reset(SEED)
+    return {'steps_per_s': steps / (time.perf_counter() - start)}
+
+
+def run_autopilot(steps):
+    # Time per decision, on positions from the autopilot's own games
+    sim = bird.Simulation(SEED)
+    autopilot = bird.Autopilot()
+    clock = time.perf_counter
+    total = 0.0
+    for _ in range(steps):
+        start = clock()
+        flap = autopilot.should_flap(sim)
+        total += clock() - start
+        sim.step(flap)
+        if sim.game_over:
+            sim.reset(SEED)
+    return {'decisions_per_s': steps / total}
+
+
+def compare(results, baseline, threshold):
+    # Prints the change of every metric and returns the regressions
+    regressions = []
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(scenario, {}).get(metric)
+            if not old:
+                continue
+            change = (value - old) / old
+            # Throughput is better when higher, timings when lower
+            worse = -change if metric.endswith('_per_s') else change
+            flag = ''
+            if worse > threshold:
+                flag = '  REGRESSION'
+                regressions.append((scenario, metric, change))
+            print(f'{scenario:>12} {metric:<26} {old:12.3f} -> {value:12.3f} ({change:+.1%}){flag}')
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark bird.py subsystems on scripted scenarios')
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help=f'scenarios to run (default: all of {", ".join(SCENARIOS)})')
+    parser.add_argument('--frames', type=int, default=600, help='frames per scenario')
+    parser.add_argument('--quality', type=int, choices=range(len(bird.QUALITY_TIERS)), default=0,
+                        help='render quality tier of the scenarios (default 0, full quality)')
+    parser.add_argument('--sim-steps', type=int, default=100000, help='steps for the headless simulation run')
+    parser.add_argument('--autopilot-steps', type=int, default=20000, help='decisions for the autopilot run')
+    parser.add_argument('--output', metavar='PATH', help='save results as JSON')
+    parser.add_argument('--baseline', metavar='PATH', help='compare against results saved earlier')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative slowdown reported as a regression (default 0.10)')
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'unknown scenario(s): {", ".join(sorted(unknown))}')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    screen = bird.init_display()
+    game_state = bird.GameState()
+
+    results = {}
+    for name in args.scenarios or SCENARIOS:
+        results[name] = run_scenario(name, args.frames, screen, game_state, args.quality)
+        print(f'{name:>12}: {results[name]["frame_ms"]:.2f} ms/frame')
+    results['simulation'] = run_simulation(args.sim_steps)
+    print(f'  simulation: {results["simulation"]["steps_per_s"]:,.0f} steps/s')
+    results['autopilot'] = run_autopilot(args.autopilot_steps)
+    print(f'   autopilot: {results["autopilot"]["decisions_per_s"]:,.0f} decisions/s')
+    pygame.quit()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,29 @@
+import time
+
+# Taken before the other imports, which are most of a cold start
+STARTED = time.perf_counter()
+
 import pygame
+import numpy as np
 import random
 import math
 import json
 import os
-
-pygame.init()
+import argparse
+import multiprocessing
+import queue
+import sqlite3
+import struct
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict, deque
+from contextlib import contextmanager, nullcontext
+from multiprocessing import shared_memory
+
+IMPORTED = time.perf_counter()
 
 WIDTH, HEIGHT = 600, 800
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('🐦 Flappy Bird for Kids! 🐦')
 
 SKY_BLUE = (135, 206, 235)
 CLOUD_WHITE = (255, 255, 255)
@@ -37,108 +52,378 @@ PIPE_WIDTH = 80
 PIPE_GAP = 200  # Increased from 180
 PIPE_SPEED = 2.5  # Reduced from 3
 GROUND_HEIGHT = 100
+PRESSURE_RANGE = 100  # Pipes closer than this push the bird up
+PRESSURE_STRENGTH = 0.2  # Push at a pipe's center, fading out towards PRESSURE_RANGE
+BIRD_SIZE = 20  # Reduced from 25 for easier gameplay
 
 POWER_UP_CHANCE = 0.4  # Increased from 0.3
 POWER_UP_SIZE = 20
 POWER_UP_SPEED = 2
 
-font = pygame.font.SysFont('Comic Sans MS', 24, bold=True)
-big_font = pygame.font.SysFont('Comic Sans MS', 48, bold=True)
-small_font = pygame.font.SysFont('Comic Sans MS', 18, bold=True)
+WEATHER_TYPES = ['clear', 'rain', 'snow', 'fog']
+POWER_UP_TYPES = ['star', 'shield']
+
+# Gravity multiplier of each season
+SEASON_GRAVITY = {'spring': 0.9, 'summer': 0.8, 'fall': 1.0, 'winter': 1.1}
+
+SNOW_GRAVITY = 0.8
+SNOW_JITTER_CHANCE = 0.1
+SNOW_JITTER = 0.5
+
+# Weather particles per unit of intensity
+RAIN_DROPS = 50
+SNOW_FLAKES = 30
+FOG_PUFFS = 20
+FOG_SIZE_STEP = 4
+FOG_ALPHA_STEP = 10
+
+PARTICLE_CAPACITY = 4096
+PARTICLE_LIFE = 30
+PARTICLE_ALPHA_STEP = 16
+
+SKY_COLOR_STEP = 4  # Sky colors closer than this share one cached gradient
+SKY_CACHE_SIZE = 32
+
+PIPE_SPRITE_CACHE_SIZE = 32  # Pipe columns kept per season palette
+SPRITE_COLORKEY = (255, 0, 255)  # Transparent color of pre-rendered sprites
+
+WING_FRAMES = 24  # wing_angle advances 15 degrees a step, so 24 steps per flap
+TILT_STEP = 5  # Degrees between pre-rendered bird tilts
+TRAIL_LENGTH = 8
+SHIELD_ALPHA_STEP = 10
+
+TEXT_CACHE_SIZE = 128
+OUTLINE_WIDTH = 2
+POPUP_ALPHA_STEP = 16
+
+GRASS_SEED = 7
+
+SAVE_FILE = 'flappy_save.json'  # High score and totals, replaced atomically
+STATS_FILE = 'flappy_stats.db'  # One row per finished game
+# System font lookups, shared by every working directory; delete to rescan
+FONT_CACHE_FILE = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                               'flappy_bird', 'fonts.json')
+# Read once, while only one thread runs: umask can only be read by setting it
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+AUTOPILOT_HORIZON = 24  # Steps the autopilot looks ahead; a flap peaks after about 17
+AUTOPILOT_MARGIN = 2  # Pixels it keeps clear of pipes, ground and ceiling
+
+SIM_HZ = 60  # Simulation steps per second, independent of the display rate
+MAX_SIM_STEPS_PER_FRAME = 5  # Beyond this the game slows down instead of stalling
+
+PROFILER_HISTORY = 240  # Frames shown in the frame-time graph
+PROFILER_HISTOGRAM_STEP_MS = 2
+PROFILER_HISTOGRAM_BUCKETS = 20
+PROFILER_MAX_SLOW_FRAMES = 500
+
+# Render quality tiers, best first. weather: share of the weather particles
+# drawn; particles: cap on live effect particles; trail: draw the bird's
+# trail; bake_stars: draw the twinkling stars once into the background
+# instead of every frame; scale: divisor of the internal resolution the world
+# is drawn at before it is scaled up to the window (needs bake_stars)
+QUALITY_TIERS = [
+    {'weather': 1.0, 'particles': PARTICLE_CAPACITY, 'trail': True, 'bake_stars': False, 'scale': 1},
+    {'weather': 0.5, 'particles': 512, 'trail': True, 'bake_stars': False, 'scale': 1},
+    {'weather': 0.25, 'particles': 128, 'trail': False, 'bake_stars': True, 'scale': 1},
+    {'weather': 0.25, 'particles': 128, 'trail': False, 'bake_stars': True, 'scale': 2},
+]
+QUALITY_SMOOTHING = 0.05  # Weight of each frame in the moving average of frame times
+QUALITY_DOWN_LOAD = 0.9  # Share of the frame budget that makes the governor drop a tier
+QUALITY_UP_LOAD = 0.5  # Share of the frame budget below which it may go back up
+QUALITY_SETTLE_FRAMES = 60  # Frames after a change before the average is trusted again
+QUALITY_UP_FRAMES = 300  # Frames of headroom before going up, doubled after every failed try
+QUALITY_MAX_UP_FRAMES = 60 * 60
+
+CAPTURE_BUFFERS = 16  # Frames the capture encoder may fall behind before frames are dropped
+
+# Created by init_display() so the simulation can run without a window
+screen = None
+font = None
+big_font = None
+small_font = None
+
+def find_font(name, bold=False):
+    # Same result as SysFont, but the system font scan behind it (hundreds of
+    # milliseconds cold) only runs once; the answer is kept in FONT_CACHE_FILE.
+    # Returns (path or None for pygame's default font, whether to fake bold).
+    key = f'{name}:{"bold" if bold else "regular"}'
+    try:
+        with open(FONT_CACHE_FILE) as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        cache = {}
+    except (OSError, ValueError) as error:
+        print(f'Could not read {FONT_CACHE_FILE}: {error}')
+        cache = {}
+
+    entry = cache.get(key)
+    if entry is not None and (entry[0] is None or os.path.exists(entry[0])):
+        return tuple(entry)
+
+    path = pygame.font.match_font(name, bold=bold)
+    # Without a bold file the match is the regular one, which SysFont emboldens
+    fake_bold = bold and path == pygame.font.match_font(name)
+    cache[key] = [path, fake_bold]
+    try:
+        os.makedirs(os.path.dirname(FONT_CACHE_FILE), exist_ok=True)
+        write_atomic(FONT_CACHE_FILE, json.dumps(cache))
+    except OSError as error:
+        print(f'Could not write {FONT_CACHE_FILE}: {error}')
+    return path, fake_bold
+
+def load_font(name, size, bold=False):
+    path, fake_bold = find_font(name, bold)
+    loaded = pygame.font.Font(path, size)
+    loaded.set_bold(fake_bold)
+    return loaded
+
+def init_fonts():
+    # Fonts work without a window, e.g. for rendering offscreen
+    global font, big_font, small_font
+    pygame.font.init()
+    font = load_font('Comic Sans MS', 24, bold=True)
+    big_font = load_font('Comic Sans MS', 48, bold=True)
+    small_font = load_font('Comic Sans MS', 18, bold=True)
+
+def init_display():
+    # Only the display and font modules: the game has no use for audio,
+    # joysticks or the rest of what pygame.init() starts
+    global screen
+    pygame.display.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption('🐦 Flappy Bird for Kids! 🐦')
+    init_fonts()
+    return screen
 
 class SoundManager:
+    # The mixer is only started once a sound is loaded
     def __init__(self):
-        pygame.mixer.init()
         self.sounds = {}
 
+    def load(self, sound_name, path):
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        self.sounds[sound_name] = pygame.mixer.Sound(path)
+
     def play(self, sound_name):
-        pass
+        sound = self.sounds.get(sound_name)
+        if sound is not None:
+            sound.play()
+
+# Random generator states in snapshots: random.Random (Mersenne Twister,
+# 624 words plus position) and NumPy's default PCG64
+RANDOM_STATE = struct.Struct('<625I?d')
+GENERATOR_STATE = struct.Struct('<16s16s?I')
+
+def pack_random(rng):
+    _, internal, gauss = rng.getstate()
+    return RANDOM_STATE.pack(*internal, gauss is not None, gauss or 0.0)
+
+def unpack_random(rng, data, offset):
+    *internal, has_gauss, gauss = RANDOM_STATE.unpack_from(data, offset)
+    rng.setstate((rng.VERSION, tuple(internal), gauss if has_gauss else None))
+    return offset + RANDOM_STATE.size
+
+def pack_generator(generator):
+    state = generator.bit_generator.state
+    return GENERATOR_STATE.pack(state['state']['state'].to_bytes(16, 'little'),
+                                state['state']['inc'].to_bytes(16, 'little'),
+                                bool(state['has_uint32']), state['uinteger'])
+
+def unpack_generator(generator, data, offset):
+    state, inc, has_uint32, uinteger = GENERATOR_STATE.unpack_from(data, offset)
+    generator.bit_generator.state = {
+        'bit_generator': 'PCG64',
+        'state': {'state': int.from_bytes(state, 'little'), 'inc': int.from_bytes(inc, 'little')},
+        'has_uint32': int(has_uint32),
+        'uinteger': uinteger,
+    }
+    return offset + GENERATOR_STATE.size
+
+class WeatherParticles:
+    # Struct-of-arrays particle store. The arrays only ever grow, so
+    # switching weather back and forth reuses the same memory.
+    def __init__(self, *fields):
+        self.fields = fields
+        self.count = 0
+        self.capacity = 0
+        for field in fields:
+            setattr(self, field, np.zeros(0))
+
+    def resize(self, count):
+        if count > self.capacity:
+            self.capacity = max(count, self.capacity * 2)
+            for field in self.fields:
+                setattr(self, field, np.zeros(self.capacity))
+        self.count = count
+
+    def view(self, *fields):
+        return [getattr(self, field)[:self.count] for field in fields]
+
+    def pack(self):
+        return struct.pack('<I', self.count) + b''.join(field.tobytes() for field in self.view(*self.fields))
+
+    def unpack(self, data, offset):
+        (count,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        self.resize(count)
+        for field in self.view(*self.fields):
+            field[:] = np.frombuffer(data, np.float64, count, offset)
+            offset += field.nbytes
+        return offset
 
 class WeatherSystem:
     def __init__(self):
-        self.rain_drops = []
-        self.snow_flakes = []
-        self.fog_particles = []
+        self.rng = np.random.default_rng()
+        self.rain_drops = WeatherParticles('x', 'y', 'speed', 'length')
+        self.snow_flakes = WeatherParticles('x', 'y', 'speed', 'size', 'sway')
+        self.fog_particles = WeatherParticles('x', 'y', 'speed', 'size', 'alpha')
         self.weather_type = 'clear'
         self.weather_intensity = 0
+        self.sprites = {}
+
+    STATE = struct.Struct('<Bd')
+
+    def pack(self):
+        return b''.join([
+            self.STATE.pack(WEATHER_TYPES.index(self.weather_type), self.weather_intensity),
+            pack_generator(self.rng),
+            self.rain_drops.pack(),
+            self.snow_flakes.pack(),
+            self.fog_particles.pack(),
+        ])
+
+    def unpack(self, data, offset):
+        weather_type, self.weather_intensity = self.STATE.unpack_from(data, offset)
+        self.weather_type = WEATHER_TYPES[weather_type]
+        offset = unpack_generator(self.rng, data, offset + self.STATE.size)
+        offset = self.rain_drops.unpack(data, offset)
+        offset = self.snow_flakes.unpack(data, offset)
+        return self.fog_particles.unpack(data, offset)
 
     def set_weather(self, weather_type, intensity=1.0):
         self.weather_type = weather_type
         self.weather_intensity = intensity
+        rng = self.rng
 
         if weather_type == 'rain':
-            self.rain_drops = []
-            for _ in range(int(50 * intensity)):
-                self.rain_drops.append({
-                    'x': random.randint(-50, WIDTH + 50),
-                    'y': random.randint(-HEIGHT, 0),
-                    'speed': random.uniform(8, 12),
-                    'length': random.randint(10, 20)
-                })
+            count = int(RAIN_DROPS * intensity)
+            self.rain_drops.resize(count)
+            x, y, speed, length = self.rain_drops.view('x', 'y', 'speed', 'length')
+            x[:] = rng.integers(-50, WIDTH + 50, count, endpoint=True)
+            y[:] = rng.integers(-HEIGHT, 0, count, endpoint=True)
+            speed[:] = rng.uniform(8, 12, count)
+            length[:] = rng.integers(10, 20, count, endpoint=True)
         elif weather_type == 'snow':
-            self.snow_flakes = []
-            for _ in range(int(30 * intensity)):
-                self.snow_flakes.append({
-                    'x': random.randint(0, WIDTH),
-                    'y': random.randint(-HEIGHT, 0),
-                    'speed': random.uniform(1, 3),
-                    'size': random.randint(2, 5),
-                    'sway': random.uniform(-0.5, 0.5)
-                })
+            count = int(SNOW_FLAKES * intensity)
+            self.snow_flakes.resize(count)
+            x, y, speed, size, sway = self.snow_flakes.view('x', 'y', 'speed', 'size', 'sway')
+            x[:] = rng.integers(0, WIDTH, count, endpoint=True)
+            y[:] = rng.integers(-HEIGHT, 0, count, endpoint=True)
+            speed[:] = rng.uniform(1, 3, count)
+            size[:] = rng.integers(2, 5, count, endpoint=True)
+            sway[:] = rng.uniform(-0.5, 0.5, count)
         elif weather_type == 'fog':
-            self.fog_particles = []
-            for _ in range(int(20 * intensity)):
-                self.fog_particles.append({
-                    'x': random.randint(-100, WIDTH + 100),
-                    'y': random.randint(0, HEIGHT - GROUND_HEIGHT),
-                    'speed': random.uniform(0.5, 1.5),
-                    'size': random.randint(40, 80),
-                    'alpha': random.randint(30, 80)
-                })
+            count = int(FOG_PUFFS * intensity)
+            self.fog_particles.resize(count)
+            x, y, speed, size, alpha = self.fog_particles.view('x', 'y', 'speed', 'size', 'alpha')
+            x[:] = rng.integers(-100, WIDTH + 100, count, endpoint=True)
+            y[:] = rng.integers(0, HEIGHT - GROUND_HEIGHT, count, endpoint=True)
+            speed[:] = rng.uniform(0.5, 1.5, count)
+            # Sizes and alphas are bucketed so every puff uses a cached sprite
+            size[:] = rng.integers(40, 80, count, endpoint=True) // FOG_SIZE_STEP * FOG_SIZE_STEP
+            alpha[:] = rng.integers(30, 80, count, endpoint=True) // FOG_ALPHA_STEP * FOG_ALPHA_STEP
 
     def update(self):
+        rng = self.rng
         if self.weather_type == 'rain':
-            for drop in self.rain_drops:
-                drop['y'] += drop['speed']
-                drop['x'] -= 2
-                if drop['y'] > HEIGHT:
-                    drop['y'] = random.randint(-50, -10)
-                    drop['x'] = random.randint(-50, WIDTH + 50)
+            x, y, speed = self.rain_drops.view('x', 'y', 'speed')
+            y += speed
+            x -= 2
+            respawn = y > HEIGHT
+            count = np.count_nonzero(respawn)
+            if count:
+                y[respawn] = rng.integers(-50, -10, count, endpoint=True)
+                x[respawn] = rng.integers(-50, WIDTH + 50, count, endpoint=True)
 
         elif self.weather_type == 'snow':
-            for flake in self.snow_flakes:
-                flake['y'] += flake['speed']
-                flake['x'] += flake['sway']
-                if flake['y'] > HEIGHT:
-                    flake['y'] = random.randint(-50, -10)
-                    flake['x'] = random.randint(0, WIDTH)
+            x, y, speed, sway = self.snow_flakes.view('x', 'y', 'speed', 'sway')
+            y += speed
+            x += sway
+            respawn = y > HEIGHT
+            count = np.count_nonzero(respawn)
+            if count:
+                y[respawn] = rng.integers(-50, -10, count, endpoint=True)
+                x[respawn] = rng.integers(0, WIDTH, count, endpoint=True)
 
         elif self.weather_type == 'fog':
-            for particle in self.fog_particles:
-                particle['x'] -= particle['speed']
-                if particle['x'] < -particle['size']:
-                    particle['x'] = WIDTH + particle['size']
-
-    def draw(self, screen):
+            x, speed, size = self.fog_particles.view('x', 'speed', 'size')
+            x -= speed
+            wrap = x < -size
+            x[wrap] = WIDTH + size[wrap]
+
+    def get_sprite(self, kind, *key):
+        sprite = self.sprites.get((kind,) + key)
+        if sprite is None:
+            if kind == 'rain':
+                length, = key
+                sprite = pygame.Surface((8, length + 2), pygame.SRCALPHA)
+                pygame.draw.line(sprite, RAIN_BLUE, (6, 0), (1, length), 2)
+            elif kind == 'snow':
+                size, = key
+                sprite = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+                pygame.draw.circle(sprite, SNOW_WHITE, (size, size), size)
+            elif kind == 'fog':
+                size, alpha = key
+                sprite = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+                pygame.draw.circle(sprite, (*FOG_GRAY, alpha), (size, size), size)
+            self.sprites[(kind,) + key] = sprite
+        return sprite
+
+    def draw(self, screen, density=1.0):
+        # density is the share of the particles drawn; all of them keep moving
+        get_sprite = self.get_sprite
         if self.weather_type == 'rain':
-            for drop in self.rain_drops:
-                pygame.draw.line(screen, RAIN_BLUE,
-                               (drop['x'], drop['y']),
-                               (drop['x'] - 5, drop['y'] + drop['length']), 2)
+            x, y, length = self.rain_drops.view('x', 'y', 'length')
+            count = math.ceil(len(x) * density)
+            screen.blits([(get_sprite('rain', l), (dx - 6, dy))
+                          for dx, dy, l in zip(x[:count].tolist(), y[:count].tolist(),
+                                               length[:count].astype(int).tolist())],
+                         doreturn=False)
 
         elif self.weather_type == 'snow':
-            for flake in self.snow_flakes:
-                pygame.draw.circle(screen, SNOW_WHITE,
-                                 (int(flake['x']), int(flake['y'])), flake['size'])
+            x, y, size = self.snow_flakes.view('x', 'y', 'size')
+            count = math.ceil(len(x) * density)
+            screen.blits([(get_sprite('snow', s), (int(fx) - s, int(fy) - s))
+                          for fx, fy, s in zip(x[:count].tolist(), y[:count].tolist(),
+                                               size[:count].astype(int).tolist())],
+                         doreturn=False)
 
         elif self.weather_type == 'fog':
-            fog_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            for particle in self.fog_particles:
-                s = pygame.Surface((particle['size'] * 2, particle['size'] * 2), pygame.SRCALPHA)
-                pygame.draw.circle(s, (*FOG_GRAY, particle['alpha']),
-                                 (particle['size'], particle['size']), particle['size'])
-                fog_surface.blit(s, (particle['x'] - particle['size'], particle['y'] - particle['size']))
-            screen.blit(fog_surface, (0, 0))
+            x, y, size, alpha = self.fog_particles.view('x', 'y', 'size', 'alpha')
+            count = math.ceil(len(x) * density)
+            screen.blits([(get_sprite('fog', s, a), (px - s, py - s))
+                          for px, py, s, a in zip(x[:count].tolist(), y[:count].tolist(),
+                                                  size[:count].astype(int).tolist(),
+                                                  alpha[:count].astype(int).tolist())],
+                         doreturn=False)
+
+def time_of_day_bucket(time_of_day):
+    # The background art only changes at these points of the day/night cycle
+    # (night below 0.25 and above 0.75, snow caps below 0.3 and above 0.7)
+    if time_of_day < 0.25:
+        return 0
+    elif time_of_day < 0.3:
+        return 1
+    elif time_of_day <= 0.7:
+        return 2
+    elif time_of_day <= 0.75:
+        return 3
+    return 4
+
+TIME_BUCKET_SAMPLES = [0.1, 0.27, 0.5, 0.72, 0.9]
 
 class BackgroundLayer:
     def __init__(self, elements, speed_multiplier, y_range):
@@ -146,18 +431,67 @@ class BackgroundLayer:
         self.speed_multiplier = speed_multiplier
         self.y_range = y_range
         self.x_offset = 0
+        self.prev_x_offset = 0
+        self.static_elements = [e for e in elements if not e.get('animated')]
+        self.animated_elements = [e for e in elements if e.get('animated')]
+        # Draw the animated elements into the strips, frozen, instead of
+        # every frame
+        self.bake_animated = False
+        # Baked, seamlessly tiling strip per time-of-day bucket and
+        # bake_animated: (surface, top)
+        self.strips = {}
 
     def update(self, base_speed):
+        self.prev_x_offset = self.x_offset
         self.x_offset -= base_speed * self.speed_multiplier
         if self.x_offset <= -WIDTH:
             self.x_offset = 0
+            self.prev_x_offset += WIDTH
+
+    def get_strip(self, time_of_day):
+        key = (time_of_day_bucket(time_of_day), self.bake_animated)
+        strip = self.strips.get(key)
+        if strip is None:
+            sample_time = TIME_BUCKET_SAMPLES[key[0]]
+            elements = self.elements if self.bake_animated else self.static_elements
+            surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+            # Also draw the neighbouring tiles so elements crossing the tile
+            # edge wrap around
+            for x_pos in (-WIDTH, 0, WIDTH):
+                for element in elements:
+                    element['draw_func'](surface, x_pos + element['x'], element['y'], sample_time)
+            bounds = surface.get_bounding_rect()
+            surface = surface.subsurface((0, bounds.top, WIDTH, bounds.height)).copy()
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha()
+            strip = self.strips[key] = (surface, bounds.top)
+        return strip
 
     def draw(self, screen, time_of_day):
-        for i in range(3):
+        self.draw_static(screen, time_of_day)
+        self.draw_animated(screen, time_of_day)
+
+    def draw_static(self, screen, time_of_day):
+        surface, top = self.get_strip(time_of_day)
+        if surface.get_height() > 0:
+            screen.blit(surface, (self.x_offset, top))
+            screen.blit(surface, (self.x_offset + WIDTH, top))
+
+    def draw_animated(self, screen, time_of_day):
+        if self.bake_animated:
+            return
+        for i in range(2):
             x_pos = i * WIDTH + self.x_offset
-            for element in self.elements:
+            for element in self.animated_elements:
                 element['draw_func'](screen, x_pos + element['x'], element['y'], time_of_day)
 
+    def get_animated_rects(self):
+        # Animated elements (twinkling stars) stay within 5px of their anchor
+        if self.bake_animated:
+            return []
+        return [pygame.Rect(i * WIDTH + self.x_offset + element['x'] - 5, element['y'] - 5, 11, 11)
+                for i in range(2) for element in self.animated_elements]
+
 class TimeSystem:
     def __init__(self):
         self.time_of_day = 0.0
@@ -202,86 +536,197 @@ class SeasonSystem:
 
     def get_season_modifiers(self):
         if self.current_season == 'spring':
-            return {'gravity': GRAVITY * 0.9, 'pipe_color': PIPE_GREEN, 'grass_color': (124, 252, 0)}  # Easier
+            return {'gravity': GRAVITY * SEASON_GRAVITY['spring'], 'pipe_color': PIPE_GREEN, 'grass_color': (124, 252, 0)}  # Easier
         elif self.current_season == 'summer':
-            return {'gravity': GRAVITY * 0.8, 'pipe_color': (255, 140, 0), 'grass_color': (34, 139, 34)}  # Easier
+            return {'gravity': GRAVITY * SEASON_GRAVITY['summer'], 'pipe_color': (255, 140, 0), 'grass_color': (34, 139, 34)}  # Easier
         elif self.current_season == 'fall':
-            return {'gravity': GRAVITY, 'pipe_color': (160, 82, 45), 'grass_color': (184, 134, 11)}
+            return {'gravity': GRAVITY * SEASON_GRAVITY['fall'], 'pipe_color': (160, 82, 45), 'grass_color': (184, 134, 11)}
         elif self.current_season == 'winter':
-            return {'gravity': GRAVITY * 1.1, 'pipe_color': (70, 130, 180), 'grass_color': (248, 248, 255)}
-
-class Particle:
-    def __init__(self, x, y, color, velocity, size=3):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.velocity = velocity
-        self.size = size
-        self.life = 30
-        self.max_life = 30
+            return {'gravity': GRAVITY * SEASON_GRAVITY['winter'], 'pipe_color': (70, 130, 180), 'grass_color': (248, 248, 255)}
+
+class ParticlePool:
+    # Fixed-capacity particle storage. Particles live in NumPy arrays, dead
+    # slots go back on a free list, and drawing is a single blits call with
+    # circle sprites cached per (color, size, alpha bucket).
+    def __init__(self, capacity=PARTICLE_CAPACITY):
+        self.capacity = capacity
+        self.limit = capacity  # Bursts beyond this many live particles are cut short
+        self.rng = np.random.default_rng()
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.life = np.zeros(capacity, dtype=np.int32)
+        self.size = np.zeros(capacity, dtype=np.int32)
+        self.color = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.free = list(range(capacity - 1, -1, -1))
+        self.colors = []
+        self.color_index = {}
+        self.sprites = {}
+
+    def __len__(self):
+        return self.capacity - len(self.free)
+
+    def clear(self):
+        self.alive[:] = False
+        self.free = list(range(self.capacity - 1, -1, -1))
+
+    def burst(self, x, y, color, count, spread, vx_range, vy_range, size=3):
+        count = min(count, len(self.free), self.limit - len(self))
+        if count <= 0:
+            return
+        slots = self.free[-count:]
+        del self.free[-count:]
+
+        if color not in self.color_index:
+            self.color_index[color] = len(self.colors)
+            self.colors.append(color)
+
+        rng = self.rng
+        self.x[slots] = x + rng.integers(-spread, spread, count, endpoint=True)
+        self.y[slots] = y + rng.integers(-spread, spread, count, endpoint=True)
+        self.vx[slots] = rng.uniform(*vx_range, count)
+        self.vy[slots] = rng.uniform(*vy_range, count)
+        self.life[slots] = PARTICLE_LIFE
+        self.size[slots] = size
+        self.color[slots] = self.color_index[color]
+        self.alive[slots] = True
 
     def update(self):
-        self.x += self.velocity[0]
-        self.y += self.velocity[1]
-        self.life -= 1
-        self.velocity = (self.velocity[0] * 0.98, self.velocity[1] + 0.1)
+        alive = self.alive
+        if len(self.free) == self.capacity:
+            return
+        self.x[alive] += self.vx[alive]
+        self.y[alive] += self.vy[alive]
+        self.life[alive] -= 1
+        self.vx[alive] *= 0.98
+        self.vy[alive] += 0.1
+
+        dead = alive & (self.life <= 0)
+        if dead.any():
+            alive &= ~dead
+            self.free.extend(np.flatnonzero(dead).tolist())
+
+    def get_bounds(self):
+        if len(self.free) == self.capacity:
+            return None
+        alive = self.alive
+        reach = int(self.size[alive].max()) + 1
+        x = self.x[alive]
+        y = self.y[alive]
+        left = int(x.min()) - reach
+        top = int(y.min()) - reach
+        return pygame.Rect(left, top, int(x.max()) + reach - left, int(y.max()) + reach - top)
+
+    def get_sprite(self, color, size, alpha):
+        key = (color, size, alpha)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, (*self.colors[color][:3], alpha), (size, size), size)
+            self.sprites[key] = sprite
+        return sprite
 
     def draw(self, screen):
-        alpha = int(255 * (self.life / self.max_life))
-        color_with_alpha = (*self.color[:3], alpha)
-        s = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
-        pygame.draw.circle(s, color_with_alpha, (self.size, self.size), self.size)
-        screen.blit(s, (self.x - self.size, self.y - self.size))
+        if len(self.free) == self.capacity:
+            return
+        slots = np.flatnonzero(self.alive)
+        size = self.size[slots]
+        alpha = 255 * self.life[slots] // PARTICLE_LIFE
+        alpha -= alpha % PARTICLE_ALPHA_STEP
+        get_sprite = self.get_sprite
+        screen.blits([(get_sprite(c, s, a), (px - s, py - s))
+                      for px, py, c, s, a in zip(self.x[slots].tolist(), self.y[slots].tolist(),
+                                                 self.color[slots].tolist(), size.tolist(), alpha.tolist())],
+                     doreturn=False)
+
+    def pack(self):
+        # Live particles only, in slot order so they keep their draw order
+        slots = np.flatnonzero(self.alive)
+        return b''.join([
+            struct.pack('<IB', len(slots), len(self.colors)),
+            b''.join(struct.pack('<BBB', *color[:3]) for color in self.colors),
+            pack_generator(self.rng),
+            *(values[slots].tobytes() for values in (self.x, self.y, self.vx, self.vy,
+                                                    self.life, self.size, self.color)),
+        ])
+
+    def unpack(self, data, offset):
+        count, color_count = struct.unpack_from('<IB', data, offset)
+        offset += 5
+        colors = [struct.unpack_from('<BBB', data, offset + 3 * i) for i in range(color_count)]
+        offset = unpack_generator(self.rng, data, offset + 3 * color_count)
+        if colors != self.colors:
+            # Sprites are keyed by color index
+            self.sprites.clear()
+        self.colors = colors
+        self.color_index = {color: i for i, color in enumerate(colors)}
+
+        self.clear()
+        for values in (self.x, self.y, self.vx, self.vy, self.life, self.size, self.color):
+            values[:count] = np.frombuffer(data, values.dtype, count, offset)
+            offset += count * values.itemsize
+        self.alive[:count] = True
+        del self.free[len(self.free) - count:]
+        return offset
 
 class PowerUp:
-    def __init__(self, x, y, power_type):
+    def __init__(self, x, y, power_type, rng=random):
         self.x = x
+        self.prev_x = x
         self.y = y
         self.power_type = power_type
         self.collected = False
-        self.bob_offset = random.uniform(0, 2 * math.pi)
+        self.bob_offset = rng.uniform(0, 2 * math.pi)
         self.bob_timer = 0
 
     def update(self):
+        self.prev_x = self.x
         self.x -= PIPE_SPEED
         self.bob_timer += 0.1
 
     def draw(self, screen):
         bob_y = self.y + math.sin(self.bob_timer + self.bob_offset) * 3
-
-        if self.power_type == 'star':
-            points = []
-            for i in range(10):
-                angle = i * math.pi / 5
-                if i % 2 == 0:
-                    radius = POWER_UP_SIZE
-                else:
-                    radius = POWER_UP_SIZE // 2
-                x = self.x + radius * math.cos(angle - math.pi/2)
-                y = bob_y + radius * math.sin(angle - math.pi/2)
-                points.append((x, y))
-            pygame.draw.polygon(screen, STAR_YELLOW, points)
-            pygame.draw.polygon(screen, GOLD, points, 2)
-
-        elif self.power_type == 'shield':
-            pygame.draw.circle(screen, POWER_UP_PURPLE, (int(self.x), int(bob_y)), POWER_UP_SIZE)
-            pygame.draw.circle(screen, WHITE, (int(self.x), int(bob_y)), POWER_UP_SIZE, 3)
+        sprite = sprite_cache.get_power_up(self.power_type)
+        reach = sprite.get_width() // 2
+        screen.blit(sprite, (int(self.x) - reach, int(bob_y) - reach))
 
     def get_rect(self):
         return pygame.Rect(self.x - POWER_UP_SIZE, self.y - POWER_UP_SIZE,
                           POWER_UP_SIZE * 2, POWER_UP_SIZE * 2)
 
+    def get_draw_rect(self):
+        # Everything draw() may touch, including the bobbing and outline
+        return pygame.Rect(self.x - POWER_UP_SIZE - 2, self.y - POWER_UP_SIZE - 5,
+                          POWER_UP_SIZE * 2 + 4, POWER_UP_SIZE * 2 + 10)
+
     def is_off_screen(self):
         return self.x + POWER_UP_SIZE < 0
 
+    STATE = struct.Struct('<dddB?dd')
+
+    def pack(self):
+        return self.STATE.pack(self.x, self.prev_x, self.y, POWER_UP_TYPES.index(self.power_type),
+                               self.collected, self.bob_offset, self.bob_timer)
+
+    @classmethod
+    def unpack(cls, data, offset):
+        power_up = cls.__new__(cls)
+        (power_up.x, power_up.prev_x, power_up.y, power_type, power_up.collected,
+         power_up.bob_offset, power_up.bob_timer) = cls.STATE.unpack_from(data, offset)
+        power_up.power_type = POWER_UP_TYPES[power_type]
+        return power_up, offset + cls.STATE.size
+
 class Bird:
     def __init__(self):
         self.x = WIDTH // 4
         self.y = HEIGHT // 2
+        self.prev_y = self.y
         self.velocity = 0
-        self.size = 20  # Reduced from 25 for easier gameplay
+        self.size = BIRD_SIZE
         self.wing_angle = 0
-        self.trail = []
+        self.trail = deque(maxlen=TRAIL_LENGTH)
         self.shield_time = 0
         self.invincible = False
         self.body_tilt = 0
@@ -295,22 +740,23 @@ class Bird:
     def jump(self):
         self.velocity = JUMP_STRENGTH
 
-    def update(self, season_modifiers, weather, pipes):
+    def update(self, season_modifiers, weather, pipes, rng=random):
+        self.prev_y = self.y
         gravity = season_modifiers['gravity']
 
         # Environmental physics - air pressure from pipes
         for pipe in pipes:
             distance = abs(pipe.x + PIPE_WIDTH/2 - self.x)
-            if distance < 100:  # Within influence range
-                pressure_effect = (100 - distance) / 100 * 0.2
+            if distance < PRESSURE_RANGE:  # Within influence range
+                pressure_effect = (PRESSURE_RANGE - distance) / PRESSURE_RANGE * PRESSURE_STRENGTH
                 if self.y < pipe.height or self.y > pipe.height + PIPE_GAP:
                     # Near pipe walls, slight upward pressure
                     gravity -= pressure_effect
 
         if weather.weather_type == 'snow':
-            gravity *= 0.8
-            if random.random() < 0.1:
-                self.velocity += random.uniform(-0.5, 0.5)
+            gravity *= SNOW_GRAVITY
+            if rng.random() < SNOW_JITTER_CHANCE:
+                self.velocity += rng.uniform(-SNOW_JITTER, SNOW_JITTER)
 
         self.velocity += gravity
         self.y += self.velocity
@@ -319,8 +765,6 @@ class Bird:
         self.body_tilt = max(-30, min(30, self.velocity * 3))
 
         self.trail.append((self.x, self.y))
-        if len(self.trail) > 8:
-            self.trail.pop(0)
 
         if self.shield_time > 0:
             self.shield_time -= 1
@@ -328,59 +772,27 @@ class Bird:
         else:
             self.invincible = False
 
-    def draw(self, screen):
+    def draw(self, screen, trail=True):
         # Trail effect
-        for i, (trail_x, trail_y) in enumerate(self.trail):
-            alpha = int(50 * (i / len(self.trail)))
-            size = int(self.size * 0.3 * (i / len(self.trail)))
-            if size > 0:
-                s = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
-                pygame.draw.circle(s, (*BIRD_YELLOW, alpha), (size, size), size)
-                screen.blit(s, (trail_x - size, trail_y - size))
+        if trail:
+            for i, (trail_x, trail_y) in enumerate(self.trail):
+                alpha = int(50 * (i / len(self.trail)))
+                size = int(self.size * 0.3 * (i / len(self.trail)))
+                if size > 0:
+                    screen.blit(bird_atlas.get_trail(size, alpha), (trail_x - size, trail_y - size))
 
         # Shield effect
         if self.invincible:
             shield_size = self.size + 8
             shield_alpha = int(100 + 50 * math.sin(self.wing_angle * 0.5))
-            s = pygame.Surface((shield_size * 2, shield_size * 2), pygame.SRCALPHA)
-            pygame.draw.circle(s, (*POWER_UP_PURPLE, shield_alpha), (shield_size, shield_size), shield_size, 3)
-            screen.blit(s, (self.x - shield_size, self.y - shield_size))
-
-        # Bird body
-        pygame.draw.ellipse(screen, BIRD_YELLOW, (self.x - self.size, self.y - self.size//2, self.size * 2, self.size))
-        pygame.draw.ellipse(screen, BIRD_ORANGE, (self.x - self.size + 3, self.y - self.size//2 + 2, self.size * 2 - 6, self.size - 4))
-
-        # Wing animation
-        wing_flap = math.sin(math.radians(self.wing_angle)) * 10
-        wing_y = self.y - 8 + wing_flap
-
-        pygame.draw.ellipse(screen, BIRD_RED, (self.x - 18, wing_y - 10, 25, 18))
-        pygame.draw.ellipse(screen, BIRD_ORANGE, (self.x - 15, wing_y - 8, 20, 14))
-
-        # Eye
-        eye_x, eye_y = self.x + 8, self.y - 5
-        pygame.draw.circle(screen, WHITE, (int(eye_x), int(eye_y)), 7)
-        pygame.draw.circle(screen, BLACK, (int(eye_x + 2), int(eye_y)), 4)
-        pygame.draw.circle(screen, WHITE, (int(eye_x + 3), int(eye_y - 1)), 1)
-
-        # Beak
-        beak_tip_x = self.x + self.size + 8
-        beak_tip_y = self.y + 2
-        beak_points = [
-            (self.x + self.size - 3, self.y - 2),
-            (beak_tip_x, beak_tip_y),
-            (self.x + self.size - 3, self.y + 6)
-        ]
-        pygame.draw.polygon(screen, BIRD_ORANGE, beak_points)
-        pygame.draw.polygon(screen, BIRD_RED, beak_points, 1)
+            screen.blit(bird_atlas.get_shield(shield_size, shield_alpha),
+                        (self.x - shield_size, self.y - shield_size))
 
-        # Tail
-        tail_points = [
-            (self.x - self.size + 2, self.y),
-            (self.x - self.size - 8, self.y - 6),
-            (self.x - self.size - 8, self.y + 6)
-        ]
-        pygame.draw.polygon(screen, BIRD_RED, tail_points)
+        # Body, wing, eye, beak and tail, tilted with the velocity
+        wing_frame = int(self.wing_angle * WING_FRAMES / 360) % WING_FRAMES
+        tilt = round(self.body_tilt / TILT_STEP) * TILT_STEP
+        sprite = bird_atlas.get_frame(self.size, wing_frame, tilt)
+        screen.blit(sprite, (int(self.x) - sprite.get_width() // 2, int(self.y) - sprite.get_height() // 2))
 
     def get_collision_rect(self):
         # More precise collision detection with smaller hitbox
@@ -390,42 +802,49 @@ class Bird:
     def get_rect(self):
         return self.get_collision_rect()
 
+    def get_draw_rect(self):
+        # Everything draw() may touch: trail, shield ring and the tilted sprite
+        reach = self.size + 14
+        ys = [y for _, y in self.trail] + [self.y]
+        top = min(ys) - reach
+        return pygame.Rect(self.x - reach, top, reach * 2, max(ys) + reach - top)
+
+    STATE = struct.Struct('<ddddqdiB?B')
+
+    def pack(self):
+        trail = [value for point in self.trail for value in point]
+        return (self.STATE.pack(self.x, self.y, self.prev_y, self.velocity, self.wing_angle, self.body_tilt,
+                                self.shield_time, self.size, self.invincible, len(self.trail))
+                + struct.pack(f'<{len(trail)}d', *trail))
+
+    def unpack(self, data, offset):
+        (self.x, self.y, self.prev_y, self.velocity, self.wing_angle, self.body_tilt,
+         self.shield_time, self.size, self.invincible, trail_length) = self.STATE.unpack_from(data, offset)
+        offset += self.STATE.size
+        trail = struct.unpack_from(f'<{2 * trail_length}d', data, offset)
+        self.trail.clear()
+        self.trail.extend(zip(trail[::2], trail[1::2]))
+        self.create_collision_mask()
+        return offset + 16 * trail_length
+
 class Pipe:
-    def __init__(self, x):
+    def __init__(self, x, rng=random):
         self.x = x
+        self.prev_x = x
         # More forgiving pipe heights
         min_height = 120  # Increased from 100
         max_height = HEIGHT - PIPE_GAP - GROUND_HEIGHT - 120  # More space
-        self.height = random.randint(min_height, max_height)
+        self.height = rng.randint(min_height, max_height)
         self.passed = False
         self.scored = False
 
     def update(self):
+        self.prev_x = self.x
         self.x -= PIPE_SPEED
 
     def draw(self, screen, pipe_color):
-        pipe_dark = tuple(max(0, c - 50) for c in pipe_color)
-
-        # Top pipe
-        top_rect = pygame.Rect(self.x, 0, PIPE_WIDTH, self.height)
-        pygame.draw.rect(screen, pipe_color, top_rect)
-        pygame.draw.rect(screen, pipe_dark, top_rect, 3)
-
-        # Top cap
-        cap_rect = pygame.Rect(self.x - 5, self.height - 20, PIPE_WIDTH + 10, 30)
-        pygame.draw.rect(screen, pipe_color, cap_rect)
-        pygame.draw.rect(screen, pipe_dark, cap_rect, 3)
-
-        # Bottom pipe
-        bottom_y = self.height + PIPE_GAP
-        bottom_rect = pygame.Rect(self.x, bottom_y, PIPE_WIDTH, HEIGHT - bottom_y - GROUND_HEIGHT)
-        pygame.draw.rect(screen, pipe_color, bottom_rect)
-        pygame.draw.rect(screen, pipe_dark, bottom_rect, 3)
-
-        # Bottom cap
-        cap_rect = pygame.Rect(self.x - 5, bottom_y, PIPE_WIDTH + 10, 30)
-        pygame.draw.rect(screen, pipe_color, cap_rect)
-        pygame.draw.rect(screen, pipe_dark, cap_rect, 3)
+        # The caps overhang the body by 5 pixels on each side
+        screen.blit(sprite_cache.get_pipe(pipe_color, self.height), (int(self.x) - 5, 0))
 
     def get_rects(self):
         # Slightly smaller collision boxes for more forgiving gameplay
@@ -435,34 +854,1092 @@ class Pipe:
                                 HEIGHT - self.height - PIPE_GAP - GROUND_HEIGHT)
         return [top_rect, bottom_rect]
 
+    def get_draw_rect(self):
+        # Whole column including the caps and a pixel for truncation
+        return pygame.Rect(self.x - 6, 0, PIPE_WIDTH + 12, HEIGHT - GROUND_HEIGHT)
+
     def is_off_screen(self):
         return self.x + PIPE_WIDTH < 0
 
-class GameState:
-    def __init__(self):
-        self.high_score = self.load_high_score()
-        self.games_played = 0
-        self.total_score = 0
+    STATE = struct.Struct('<ddi??')
+
+    def pack(self):
+        return self.STATE.pack(self.x, self.prev_x, self.height, self.passed, self.scored)
+
+    @classmethod
+    def unpack(cls, data, offset):
+        pipe = cls.__new__(cls)
+        pipe.x, pipe.prev_x, pipe.height, pipe.passed, pipe.scored = cls.STATE.unpack_from(data, offset)
+        return pipe, offset + cls.STATE.size
+
+class PipeQueue(deque):
+    # Pipes in spawn order. They all spawn on the right and move at the same
+    # speed, so the queue is also sorted by x: the leftmost pipe is at the
+    # front and leaves the screen first.
+
+    def near(self, left, right):
+        # Pipes with left < x < right, scanning from the front
+        for pipe in self:
+            if pipe.x >= right:
+                break
+            if pipe.x > left:
+                yield pipe
+
+    def before(self, right):
+        # Pipes with x < right, i.e. everything up to a point on screen
+        for pipe in self:
+            if pipe.x >= right:
+                break
+            yield pipe
+
+    def drop_off_screen(self):
+        while self and self[0].is_off_screen():
+            self.popleft()
+
+def write_atomic(path, text):
+    # Write a temporary file next to path, flush it to disk and rename it over
+    # path, so readers and power cuts only ever see the old or the new file
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~UMASK  # What open() would have created
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path), dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file owner-only, and the rename keeps that
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    # The rename itself is only durable once the directory is synced
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+class SaveWriter:
+    # Saves finished games on a background thread so game over never waits on
+    # the disk. Whatever queued up while the last write ran goes out as one
+    # batch: one SQLite transaction (WAL mode) for the game rows, then one
+    # atomic replace of the summary file with the newest totals.
+    def __init__(self, summary_path=SAVE_FILE, stats_path=STATS_FILE):
+        self.summary_path = summary_path
+        self.stats_path = stats_path
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name='save-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, game, summary):
+        self.queue.put((game, summary))
+
+    def close(self):
+        # Waits for everything submitted so far to be written
+        self.queue.put(None)
+        self.thread.join()
+
+    def open_stats(self):
+        connection = sqlite3.connect(self.stats_path)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # Seeds are unsigned 64-bit, too big for an SQLite INTEGER, so they are stored as text
+        connection.execute('CREATE TABLE IF NOT EXISTS games ('
+                           'id INTEGER PRIMARY KEY, played_at REAL, seed TEXT, score INTEGER, frames INTEGER)')
+        return connection
+
+    def run(self):
+        connection = None
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                running = False
+                batch.pop()
+            if not batch:
+                continue
+
+            try:
+                if connection is None:
+                    connection = self.open_stats()
+                with connection:
+                    connection.executemany('INSERT INTO games (played_at, seed, score, frames) VALUES (?, ?, ?, ?)',
+                                           [game for game, _ in batch])
+                write_atomic(self.summary_path, json.dumps(batch[-1][1]))
+            except (OSError, sqlite3.Error) as error:
+                print(f'Could not save game stats: {error}')
+
+        if connection is not None:
+            connection.close()
 
-    def load_high_score(self):
+class GameState:
+    def __init__(self, summary_path=SAVE_FILE, stats_path=STATS_FILE):
+        self.summary_path = summary_path
+        self.stats_path = stats_path
+        self.writer = None
+        summary = self.load_summary()
+        self.high_score = summary.get('high_score', 0)
+        self.games_played = summary.get('games_played', 0)
+        self.total_score = summary.get('total_score', 0)
+
+    def load_summary(self):
         try:
-            if os.path.exists('flappy_save.json'):
-                with open('flappy_save.json', 'r') as f:
-                    data = json.load(f)
-                    return data.get('high_score', 0)
-        except:
-            pass
-        return 0
+            with open(self.summary_path) as f:
+                summary = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as error:
+            print(f'Could not read {self.summary_path}: {error}')
+            return {}
+        return summary if isinstance(summary, dict) else {}
+
+    def get_summary(self):
+        return {'high_score': self.high_score, 'games_played': self.games_played,
+                'total_score': self.total_score}
+
+    def record_game(self, score, seed, frames):
+        # Updates the totals right away and leaves the disk to the writer
+        self.high_score = max(self.high_score, score)
+        self.games_played += 1
+        self.total_score += score
+        if self.writer is None:
+            self.writer = SaveWriter(self.summary_path, self.stats_path)
+        self.writer.submit((time.time(), str(seed), score, frames), self.get_summary())
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+class Simulation:
+    # Game rules without any window, surface or font. step() advances one
+    # frame and records what happened in self.events so a renderer can add
+    # sounds, particles and popups on top.
+    #
+    # All gameplay randomness comes from self.rng, seeded by reset(seed), so
+    # the same seed and the same flaps always replay the same game.
+    #
+    # snapshot() packs the whole state, generators included, into a few KB
+    # and restore() puts it back, for checkpoints and lookahead search.
+    MAGIC = b'FBSS'
+    VERSION = 1
+    STATE = struct.Struct('<4sBQqIii?dIBHH')
+
+    def __init__(self, seed=None):
+        self.weather = WeatherSystem()
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        elif not 0 <= seed < 2 ** 64:
+            # Replays and snapshots store the seed as an unsigned 64-bit value
+            raise ValueError(f'seed must be between 0 and 2**64 - 1, not {seed}')
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # Weather particles are cosmetic and only advanced by the renderer, so
+        # they get their own stream derived from the seed
+        self.weather.rng = np.random.default_rng(seed)
+        self.bird = Bird()
+        self.pipes = PipeQueue()
+        self.power_ups = []
+        self.score = 0
+        self.game_over = False
+        self.frame = 0
+        self.pipe_timer = 0
+        self.weather_timer = 0
+        self.time_system = TimeSystem()
+        self.season_system = SeasonSystem()
+        self.weather.set_weather('clear')
+        self.events = []
+
+    def step(self, flap=False):
+        events = self.events = []
+        if self.game_over:
+            return events
+
+        bird = self.bird
+        rng = self.rng
+        if flap:
+            bird.jump()
+            events.append(('jump',))
+
+        self.frame += 1
+        profiler.mark('sim.weather')
+        self.time_system.update(self.score)
+        self.season_system.update(self.score)
+        season_modifiers = self.season_system.get_season_modifiers()
+
+        self.weather_timer += 1
+        if self.weather_timer > 1800:
+            self.weather_timer = 0
+            if rng.random() < 0.3:
+                new_weather = rng.choice(WEATHER_TYPES)
+                self.weather.set_weather(new_weather, rng.uniform(0.5, 1.0))
+                events.append(('weather', new_weather))
+
+        profiler.mark('sim.bird')
+        center = bird.x - PIPE_WIDTH / 2
+        nearby = self.pipes.near(center - PRESSURE_RANGE, center + PRESSURE_RANGE)
+        bird.update(season_modifiers, self.weather, nearby, rng)
+
+        if bird.y > HEIGHT - GROUND_HEIGHT - bird.size or bird.y < -bird.size:
+            self.end_game()
+
+        profiler.mark('sim.spawn')
+        self.pipe_timer += 1
+        if self.pipe_timer > 90:
+            self.pipes.append(Pipe(WIDTH, rng))
+            self.pipe_timer = 0
+
+            if rng.random() < POWER_UP_CHANCE:
+                power_type = rng.choice(POWER_UP_TYPES)
+                power_y = rng.randint(100, HEIGHT - GROUND_HEIGHT - 100)
+                self.power_ups.append(PowerUp(WIDTH + 150, power_y, power_type, rng))
+
+        profiler.mark('sim.pipes')
+        for pipe in self.pipes:
+            pipe.update()
+
+        # Pipes starting right of the bird's hitbox can neither be scored nor
+        # hit yet, so only the front of the queue needs checking
+        for pipe in self.pipes.before(bird.x + bird.collision_size):
+            if not pipe.scored and pipe.x + PIPE_WIDTH < bird.x:
+                pipe.scored = True
+                points = 1
+
+                if self.season_system.current_season == 'winter':
+                    points = 2
+                elif self.weather.weather_type == 'fog':
+                    points = 3
+
+                self.score += points
+                events.append(('score', points, bird.x, bird.y))
+
+            if not bird.invincible:
+                bird_rect = bird.get_collision_rect()
+                for pipe_rect in pipe.get_rects():
+                    if bird_rect.colliderect(pipe_rect):
+                        self.end_game()
+                        break
+
+        self.pipes.drop_off_screen()
+
+        profiler.mark('sim.power_ups')
+        for power_up in self.power_ups[:]:
+            power_up.update()
+
+            if bird.get_rect().colliderect(power_up.get_rect()) and not power_up.collected:
+                power_up.collected = True
+
+                if power_up.power_type == 'star':
+                    bonus_points = 5
+                    self.score += bonus_points
+                    events.append(('star', bonus_points, power_up.x, power_up.y))
+                elif power_up.power_type == 'shield':
+                    bird.shield_time = 300
+                    events.append(('shield', power_up.x, power_up.y))
+
+                self.power_ups.remove(power_up)
+            elif power_up.is_off_screen():
+                self.power_ups.remove(power_up)
+
+        profiler.mark(None)
+        return events
+
+    def snapshot(self):
+        return b''.join([
+            self.STATE.pack(self.MAGIC, self.VERSION, self.seed, self.score, self.frame, self.pipe_timer,
+                            self.weather_timer, self.game_over, self.time_system.time_of_day,
+                            self.time_system.day_length, self.season_system.season_index,
+                            len(self.pipes), len(self.power_ups)),
+            pack_random(self.rng),
+            self.bird.pack(),
+            self.weather.pack(),
+            *(pipe.pack() for pipe in self.pipes),
+            *(power_up.pack() for power_up in self.power_ups),
+        ])
+
+    def restore(self, data):
+        (magic, version, self.seed, self.score, self.frame, self.pipe_timer, self.weather_timer,
+         self.game_over, time_of_day, day_length, season_index, pipe_count,
+         power_up_count) = self.STATE.unpack_from(data)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError('not a bird snapshot (or an unsupported version)')
+        self.time_system.time_of_day = time_of_day
+        self.time_system.day_length = day_length
+        seasons = self.season_system
+        seasons.season_index = season_index
+        seasons.current_season = seasons.seasons[season_index]
+
+        offset = unpack_random(self.rng, data, self.STATE.size)
+        offset = self.bird.unpack(data, offset)
+        offset = self.weather.unpack(data, offset)
+        self.pipes.clear()
+        for _ in range(pipe_count):
+            pipe, offset = Pipe.unpack(data, offset)
+            self.pipes.append(pipe)
+        self.power_ups = []
+        for _ in range(power_up_count):
+            power_up, offset = PowerUp.unpack(data, offset)
+            self.power_ups.append(power_up)
+        self.events = []
+
+    def end_game(self):
+        if not self.game_over:
+            self.game_over = True
+            self.events.append(('game_over',))
+
+class Autopilot:
+    # Plays by looking up precomputed trajectories. For each gravity the bird
+    # can feel (every season, with and without snow), row w of a table holds
+    # the offsets over the next horizon steps if the bird waits w steps and
+    # then flaps once; the current velocity adds min(step, w) * velocity on
+    # top. A decision compares every row with the gap windows of the pipes
+    # ahead in a few array operations, and flaps only when flapping now ranks
+    # above every row that waits.
+    def __init__(self, horizon=AUTOPILOT_HORIZON, margin=AUTOPILOT_MARGIN):
+        self.horizon = horizon
+        self.margin = margin
+        steps = np.arange(1, horizon + 1)
+        waited = np.minimum(steps, np.arange(horizon + 1)[:, None])
+        self.velocity_steps = waited.astype(float)
+        self.tables = {}
+        for season, factor in SEASON_GRAVITY.items():
+            for snow in (False, True):
+                gravity = GRAVITY * factor * (SNOW_GRAVITY if snow else 1)
+                k = np.arange(horizon + 1)
+                fall = gravity * k * (k + 1) / 2  # From rest
+                flap = k * JUMP_STRENGTH + fall
+                self.tables[season, snow] = fall[waited] + flap[steps - waited]
+
+        # Reused every decision: the bird's path under each plan, the hard
+        # limits and targets per step, and whether each plan is still alive
+        # at each step plus a column that never is, so argmin finds the first
+        # fatal step (or the horizon)
+        self.paths = np.empty((horizon + 1, horizon))
+        self.limits = np.empty((4, horizon))
+        self.alive = np.zeros((horizon + 1, horizon + 1), dtype=bool)
+
+    def should_flap(self, sim):
+        b = sim.bird
+        paths = np.multiply(self.velocity_steps, b.velocity, out=self.paths)
+        paths += self.tables[sim.season_system.current_season, sim.weather.weather_type == 'snow']
+        paths += b.y
+
+        # Each step is governed by the first pipe the hitbox has not cleared
+        # by then. Its gap is a hard limit while the pipe overlaps the hitbox
+        # (unless the shield still lasts) and a target on the way there; the
+        # screen edges are hard limits throughout. Pipes move at a constant
+        # speed, so these are ranges of steps (row i is step i + 1).
+        low, high, target_low, target_high = limits = self.limits
+        ceiling = self.margin - b.size
+        floor = HEIGHT - GROUND_HEIGHT - b.size - self.margin
+        limits.T[:] = ceiling, floor, ceiling, floor
+        reach = b.collision_size
+        top = b.collision_size // 2 + self.margin
+        bottom = PIPE_GAP - (b.collision_size - b.collision_size // 2) - self.margin
+        start = 0
+        for pipe in sim.pipes:
+            cleared = min(self.horizon, math.ceil((pipe.x + PIPE_WIDTH - 3 - b.x + reach) / PIPE_SPEED - 1))
+            if cleared <= start:
+                continue
+            entered = max(start, b.shield_time, math.floor((pipe.x + 3 - b.x - reach) / PIPE_SPEED - 1) + 1)
+            target_low[start:cleared] = low[entered:cleared] = pipe.height + top
+            target_high[start:cleared] = high[entered:cleared] = pipe.height + bottom
+            start = cleared
+            if start == self.horizon:
+                break
+
+        # Plans are ranked by the steps they survive, then by how far they
+        # stray from the targets (a step survived outweighs any stray); flap
+        # now only if that beats every plan that waits
+        alive = self.alive[:, :-1]
+        np.greater(paths, low, out=alive)
+        alive &= paths < high
+        survived = self.alive.argmin(axis=1)
+        stray = (np.maximum(paths, target_low) - np.minimum(paths, target_high)).sum(axis=1)
+        rank = survived * (self.horizon * HEIGHT) - stray
+        return rank[0] > rank[1:].max()
+
+class Replay:
+    # A game's seed plus the simulation steps on which SPACE was pressed.
+    # Stored as a small header followed by varint-encoded step deltas.
+    MAGIC = b'FBRP'
+    VERSION = 1
+    HEADER = struct.Struct('<4sBQI')
+
+    def __init__(self, seed, flaps=()):
+        self.seed = seed
+        self.flaps = list(flaps)
+        self.flap_set = set(self.flaps)
+
+    def record(self, step):
+        self.flaps.append(step)
+        self.flap_set.add(step)
+
+    def should_flap(self, step):
+        return step in self.flap_set
+
+    def to_bytes(self):
+        data = bytearray(self.HEADER.pack(self.MAGIC, self.VERSION, self.seed, len(self.flaps)))
+        previous = 0
+        for step in self.flaps:
+            delta = step - previous
+            previous = step
+            while delta >= 0x80:
+                data.append(delta & 0x7f | 0x80)
+                delta >>= 7
+            data.append(delta)
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, count = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError('not a bird replay (or an unsupported version)')
+        flaps = []
+        step = 0
+        pos = cls.HEADER.size
+        for _ in range(count):
+            delta = shift = 0
+            while True:
+                byte = data[pos]
+                pos += 1
+                delta |= (byte & 0x7f) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            step += delta
+            flaps.append(step)
+        return cls(seed, flaps)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    def play(self, sim=None):
+        # Re-runs the game headless and returns the finished Simulation
+        if sim is None:
+            sim = Simulation()
+        sim.reset(self.seed)
+        while not sim.game_over:
+            sim.step(self.should_flap(sim.frame + 1))
+        return sim
+
+class Span:
+    __slots__ = ('events', 'name', 'start')
+
+    def __init__(self, events, name):
+        self.events = events
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.events.append((self.name, self.start, time.perf_counter_ns()))
+
+NULL_SPAN = nullcontext()
+
+class FrameProfiler:
+    # Timing spans around the phases of a frame. Frames that run over budget
+    # are kept and can be saved as a Chrome trace (chrome://tracing or
+    # ui.perfetto.dev). While disabled, span() and mark() return at once.
+    def __init__(self, budget_ms=1000 / 60):
+        self.enabled = False
+        self.show_overlay = False
+        self.budget_ms = budget_ms
+        self.frame_times = deque(maxlen=PROFILER_HISTORY)
+        self.histogram = [0] * PROFILER_HISTOGRAM_BUCKETS
+        self.slow_frames = deque(maxlen=PROFILER_MAX_SLOW_FRAMES)
+        self.events = []
+        self.frame_index = 0
+        self.frame_start = None
+        self.mark_name = None
+        self.mark_start = 0
+
+    def span(self, name):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self.events, name)
+
+    def mark(self, name):
+        # Ends the previous mark and starts a new one, for back-to-back
+        # phases that would be awkward to wrap in with-blocks. mark(None)
+        # just ends the current one.
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        if self.mark_name is not None:
+            self.events.append((self.mark_name, self.mark_start, now))
+        self.mark_name = name
+        self.mark_start = now
+
+    def begin_frame(self):
+        self.frame_index += 1
+        if self.enabled:
+            self.events = []
+            self.frame_start = time.perf_counter_ns()
+        else:
+            self.frame_start = None
+
+    def end_frame(self):
+        # A frame during which F3 turned profiling on was only partly timed
+        if not self.enabled or self.frame_start is None:
+            return
+        end = time.perf_counter_ns()
+        frame_ms = (end - self.frame_start) / 1e6
+        self.frame_times.append(frame_ms)
+        bucket = min(int(frame_ms / PROFILER_HISTOGRAM_STEP_MS), PROFILER_HISTOGRAM_BUCKETS - 1)
+        self.histogram[bucket] += 1
+        if frame_ms > self.budget_ms:
+            self.slow_frames.append((self.frame_index, self.frame_start, end, self.events))
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+        if self.show_overlay:
+            self.enabled = True
+
+    def save_trace(self, path):
+        trace = []
+        for frame_index, start, end, events in self.slow_frames:
+            trace.append({'name': f'frame {frame_index}', 'ph': 'X', 'pid': 1, 'tid': 1,
+                          'ts': start / 1000, 'dur': (end - start) / 1000})
+            for name, span_start, span_end in events:
+                trace.append({'name': name, 'ph': 'X', 'pid': 1, 'tid': 1,
+                              'ts': span_start / 1000, 'dur': (span_end - span_start) / 1000})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+
+    def get_overlay_rect(self):
+        width = PROFILER_HISTORY
+        return pygame.Rect(WIDTH - width - 10, 10, width, 150)
 
-    def save_high_score(self, score):
-        if score > self.high_score:
-            self.high_score = score
+    def draw(self, screen):
+        rect = self.get_overlay_rect()
+        pygame.draw.rect(screen, BLACK, rect)
+        graph_height = 70
+        scale = graph_height / (self.budget_ms * 2)
+
+        # Frame time graph, one bar per frame, red when over budget
+        bottom = rect.top + graph_height
+        for i, frame_ms in enumerate(self.frame_times):
+            color = BIRD_RED if frame_ms > self.budget_ms else GRASS_GREEN
+            x = rect.left + i
+            pygame.draw.line(screen, color, (x, bottom), (x, bottom - min(graph_height, frame_ms * scale)))
+        budget_y = bottom - self.budget_ms * scale
+        pygame.draw.line(screen, GOLD, (rect.left, budget_y), (rect.right, budget_y))
+
+        # Histogram of all frame times so far
+        counts = max(self.histogram) or 1
+        bar_width = rect.width // PROFILER_HISTOGRAM_BUCKETS
+        histogram_bottom = rect.bottom - 25
+        for i, count in enumerate(self.histogram):
+            bar_height = 45 * count / counts
+            over = (i + 1) * PROFILER_HISTOGRAM_STEP_MS > self.budget_ms
+            pygame.draw.rect(screen, BIRD_ORANGE if over else SKY_BLUE,
+                             (rect.left + i * bar_width, histogram_bottom - bar_height, bar_width - 1, bar_height))
+
+        if self.frame_times:
+            times = sorted(self.frame_times)
+            summary = (f'avg {sum(times) / len(times):.1f} ms  '
+                       f'p99 {times[int(len(times) * 0.99)]:.1f} ms  slow {len(self.slow_frames)}')
+            screen.blit(small_font.render(summary, True, WHITE), (rect.left + 4, rect.bottom - 24))
+
+profiler = FrameProfiler()
+
+class FramePacer:
+    # Caps the frame rate like Clock.tick(), but spends the wait blocked on
+    # the event queue instead of asleep, so every event is stamped with
+    # time.perf_counter() within about a millisecond of arriving rather than
+    # when the next frame starts. Events that arrive while a frame is being
+    # drawn are stamped when wait() begins.
+    def __init__(self, fps):
+        self.frame_s = 1 / fps if fps else 0
+        self.frame_start = time.perf_counter()
+        self.next_frame = self.frame_start
+
+    def wait(self):
+        # Returns the milliseconds since the previous frame started and the
+        # (time, event) pairs seen since then
+        stamped = []
+        now = time.perf_counter()
+        stamped += [(now, event) for event in pygame.event.get()]
+        while True:
+            remaining = self.next_frame - time.perf_counter()
+            if remaining <= 0:
+                break
+            event = pygame.event.wait(max(1, int(remaining * 1000)))
+            if event.type != pygame.NOEVENT:
+                stamped.append((time.perf_counter(), event))
+
+        now = time.perf_counter()
+        # Keep the cadence after a short oversleep; after a long frame start
+        # the next one right away instead of bursting to catch up
+        self.next_frame = max(self.next_frame + self.frame_s, now)
+        elapsed_ms = 1000 * (now - self.frame_start)
+        self.frame_start = now
+        return elapsed_ms, stamped
+
+class LatencyProbe:
+    # Time from a flap key press to the end of present() for the first frame
+    # drawn after the simulation step that applied it
+    def __init__(self):
+        self.pending = []  # (step, press time)
+        self.samples_ms = []
+
+    def applied(self, press_time, step):
+        self.pending.append((step, press_time))
+
+    def presented(self, sim_frame):
+        if not self.pending:
+            return
+        now = time.perf_counter()
+        shown = [press_time for step, press_time in self.pending if step <= sim_frame]
+        if shown:
+            self.samples_ms += [1000 * (now - press_time) for press_time in shown]
+            self.pending = [(step, press_time) for step, press_time in self.pending if step > sim_frame]
+
+    def reset(self):
+        # A restart drops flaps that were never shown
+        self.pending = []
+
+    def summary(self):
+        if not self.samples_ms:
+            return 'Input latency: no flaps measured'
+        samples = sorted(self.samples_ms)
+        count = len(samples)
+        return (f'Input latency over {count} flaps: mean {sum(samples) / count:.1f} ms, '
+                f'p50 {samples[count // 2]:.1f} ms, p95 {samples[int(count * 0.95)]:.1f} ms, '
+                f'max {samples[-1]:.1f} ms')
+
+class QualityGovernor:
+    # Picks a QUALITY_TIERS index from measured frame times (the work of a
+    # frame, not the wait for the frame cap). A moving average above
+    # QUALITY_DOWN_LOAD of the budget drops a tier; staying below
+    # QUALITY_UP_LOAD for QUALITY_UP_FRAMES goes back up one. A tier that
+    # turns out too slow again right after going up makes the next try wait
+    # twice as long, so a machine on the edge does not flicker between two.
+    def __init__(self, budget_ms, tier=0):
+        self.budget_ms = budget_ms
+        self.tier = tier
+        self.average_ms = None
+        self.frames = 0  # Since the last change
+        self.went_up = False
+        self.up_frames = QUALITY_UP_FRAMES
+        self.headroom_frames = 0
+
+    def update(self, frame_ms):
+        # Returns the tier to draw the next frame with
+        if self.average_ms is None:
+            self.average_ms = frame_ms
+        else:
+            self.average_ms += (frame_ms - self.average_ms) * QUALITY_SMOOTHING
+        self.frames += 1
+        if self.frames < QUALITY_SETTLE_FRAMES:
+            return self.tier
+
+        if self.average_ms > self.budget_ms * QUALITY_DOWN_LOAD:
+            if self.tier < len(QUALITY_TIERS) - 1:
+                if self.went_up and self.frames < self.up_frames:
+                    self.up_frames = min(self.up_frames * 2, QUALITY_MAX_UP_FRAMES)
+                self.change(self.tier + 1, went_up=False)
+        elif self.average_ms < self.budget_ms * QUALITY_UP_LOAD and self.tier > 0:
+            self.headroom_frames += 1
+            if self.headroom_frames >= self.up_frames:
+                self.change(self.tier - 1, went_up=True)
+        else:
+            self.headroom_frames = 0
+        return self.tier
+
+    def change(self, tier, went_up):
+        self.tier = tier
+        self.went_up = went_up
+        self.frames = 0
+        self.headroom_frames = 0
+
+def encode_frames(path, memory_name, shape, width, channels, todo, done):
+    # Capture encoder process: turns ring slots into PNG files or appends them
+    # to a raw RGB24 video file, then hands the slot back
+    memory = shared_memory.SharedMemory(name=memory_name)
+    ring = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)
+    height = shape[1]
+    raw = open(path, 'wb') if path.endswith('.raw') else None
+    try:
+        while True:
+            item = todo.get()
+            if item is None:
+                break
+            slot, number = item
+            rgb = ring[slot, :, :width * 4].reshape(height, width, 4)[:, :, channels].tobytes()
+            done.put(slot)
+            if raw:
+                raw.write(rgb)
+            else:
+                frame = pygame.image.frombuffer(rgb, (width, height), 'RGB')
+                pygame.image.save(frame, os.path.join(path, f'frame_{number:06d}.png'))
+    finally:
+        if raw:
+            raw.close()
+        del ring
+        memory.close()
+
+class FrameRecorder:
+    # Copies every presented frame into a ring of preallocated shared-memory
+    # buffers for an encoder process (image saving holds the GIL, so a thread
+    # would still stall the game). The game thread only pays for one memory
+    # copy; when no buffer is free the frame is dropped and counted instead
+    # of waiting for the encoder.
+    def __init__(self, path, surface, buffers=CAPTURE_BUFFERS):
+        if surface.get_bytesize() != 4:
+            raise ValueError('frame capture needs a 32-bit display surface')
+        if not path.endswith('.raw'):
+            os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.shape = (buffers, surface.get_height(), surface.get_pitch())
+        self.memory = shared_memory.SharedMemory(create=True, size=int(np.prod(self.shape)))
+        self.ring = np.ndarray(self.shape, dtype=np.uint8, buffer=self.memory.buf)
+        self.free = deque(range(buffers))
+        self.todo = multiprocessing.Queue()
+        self.done = multiprocessing.Queue()
+        self.captured = 0
+        self.dropped = 0
+        # Byte offset of red, green and blue within a little-endian pixel
+        channels = [mask.bit_length() // 8 - 1 for mask in surface.get_masks()[:3]]
+        self.process = multiprocessing.Process(
+            target=encode_frames, name='frame-encoder', daemon=True,
+            args=(path, self.memory.name, self.shape, surface.get_width(), channels, self.todo, self.done))
+        self.process.start()
+
+    def capture(self, surface):
+        while True:
             try:
-                data = {'high_score': self.high_score}
-                with open('flappy_save.json', 'w') as f:
-                    json.dump(data, f)
-            except:
-                pass
+                self.free.append(self.done.get_nowait())
+            except queue.Empty:
+                break
+        if not self.free:
+            self.dropped += 1
+            return
+        slot = self.free.popleft()
+        buffer = surface.get_buffer()
+        self.ring[slot] = np.frombuffer(buffer, np.uint8).reshape(self.shape[1:])
+        # Releasing the buffer unlocks the surface for the next frame
+        del buffer
+        self.todo.put((slot, self.captured + self.dropped))
+        self.captured += 1
+
+    def close(self):
+        self.todo.put(None)
+        self.process.join()
+        del self.ring
+        self.memory.close()
+        self.memory.unlink()
+
+class SkyGradientCache:
+    # Pre-rendered sky gradients keyed by quantized sky color. The sky only
+    # changes with the time of day and weather, so most frames are one blit.
+    def __init__(self, max_size=SKY_CACHE_SIZE):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+
+    def key(self, sky_color):
+        return tuple(c - c % SKY_COLOR_STEP for c in sky_color)
+
+    def get(self, sky_color):
+        key = self.key(sky_color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = self.render(key)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def render(self, sky_color):
+        sky_height = HEIGHT - GROUND_HEIGHT
+        column = pygame.Surface((1, sky_height))
+        for y in range(sky_height):
+            color_ratio = y / sky_height
+            r = int(sky_color[0] + (255 - sky_color[0]) * color_ratio * 0.3)
+            g = int(sky_color[1] + (255 - sky_color[1]) * color_ratio * 0.3)
+            b = int(sky_color[2] + (255 - sky_color[2]) * color_ratio * 0.1)
+            column.set_at((0, y), (r, g, b))
+        surface = pygame.transform.scale(column, (WIDTH, sky_height))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        return surface
+
+sky_cache = SkyGradientCache()
+
+class SpriteCache:
+    # Pre-rendered pipes and power-ups. A pipe keeps its height for its whole
+    # life, so its column is drawn once and then blitted every frame; the
+    # columns are dropped whenever the season changes the pipe color.
+    def __init__(self, max_size=PIPE_SPRITE_CACHE_SIZE):
+        self.max_size = max_size
+        self.pipe_color = None
+        self.pipes = OrderedDict()
+        self.power_ups = {}
+
+    def get_pipe(self, pipe_color, height):
+        if pipe_color != self.pipe_color:
+            self.pipe_color = pipe_color
+            self.pipes.clear()
+
+        surface = self.pipes.get(height)
+        if surface is not None:
+            self.pipes.move_to_end(height)
+            return surface
+
+        surface = self.render_pipe(pipe_color, height)
+        self.pipes[height] = surface
+        if len(self.pipes) > self.max_size:
+            self.pipes.popitem(last=False)
+        return surface
+
+    def render_pipe(self, pipe_color, height):
+        pipe_dark = tuple(max(0, c - 50) for c in pipe_color)
+        surface = pygame.Surface((PIPE_WIDTH + 10, HEIGHT - GROUND_HEIGHT))
+        surface.fill(SPRITE_COLORKEY)
+        x = 5
+
+        # Top pipe
+        top_rect = pygame.Rect(x, 0, PIPE_WIDTH, height)
+        pygame.draw.rect(surface, pipe_color, top_rect)
+        pygame.draw.rect(surface, pipe_dark, top_rect, 3)
+
+        # Top cap
+        cap_rect = pygame.Rect(x - 5, height - 20, PIPE_WIDTH + 10, 30)
+        pygame.draw.rect(surface, pipe_color, cap_rect)
+        pygame.draw.rect(surface, pipe_dark, cap_rect, 3)
+
+        # Bottom pipe
+        bottom_y = height + PIPE_GAP
+        bottom_rect = pygame.Rect(x, bottom_y, PIPE_WIDTH, HEIGHT - bottom_y - GROUND_HEIGHT)
+        pygame.draw.rect(surface, pipe_color, bottom_rect)
+        pygame.draw.rect(surface, pipe_dark, bottom_rect, 3)
+
+        # Bottom cap
+        cap_rect = pygame.Rect(x - 5, bottom_y, PIPE_WIDTH + 10, 30)
+        pygame.draw.rect(surface, pipe_color, cap_rect)
+        pygame.draw.rect(surface, pipe_dark, cap_rect, 3)
+
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        surface.set_colorkey(SPRITE_COLORKEY, pygame.RLEACCEL)
+        return surface
+
+    def get_power_up(self, power_type):
+        # Bobbing only moves the icon, so one sprite per type covers every phase
+        surface = self.power_ups.get(power_type)
+        if surface is None:
+            surface = self.power_ups[power_type] = self.render_power_up(power_type)
+        return surface
+
+    def render_power_up(self, power_type):
+        reach = POWER_UP_SIZE + 2
+        surface = pygame.Surface((reach * 2, reach * 2), pygame.SRCALPHA)
+
+        if power_type == 'star':
+            points = []
+            for i in range(10):
+                angle = i * math.pi / 5
+                if i % 2 == 0:
+                    radius = POWER_UP_SIZE
+                else:
+                    radius = POWER_UP_SIZE // 2
+                x = reach + radius * math.cos(angle - math.pi/2)
+                y = reach + radius * math.sin(angle - math.pi/2)
+                points.append((x, y))
+            pygame.draw.polygon(surface, STAR_YELLOW, points)
+            pygame.draw.polygon(surface, GOLD, points, 2)
+
+        elif power_type == 'shield':
+            pygame.draw.circle(surface, POWER_UP_PURPLE, (reach, reach), POWER_UP_SIZE)
+            pygame.draw.circle(surface, WHITE, (reach, reach), POWER_UP_SIZE, 3)
+
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        return surface
+
+sprite_cache = SpriteCache()
+
+class BirdAtlas:
+    # Bird frames pre-rendered for every wing phase and quantized tilt, plus
+    # the trail dots and shield ring by size and alpha. Frames are rendered
+    # on first use and shared by every bird on screen.
+    def __init__(self):
+        self.frames = {}
+        self.trail_dots = {}
+        self.shields = {}
+
+    def get_frame(self, size, wing_frame, tilt):
+        key = (size, wing_frame, tilt)
+        surface = self.frames.get(key)
+        if surface is None:
+            surface = self.frames[key] = self.render_frame(size, wing_frame, tilt)
+        return surface
+
+    def render_frame(self, size, wing_frame, tilt):
+        # Drawn around the center of a square so rotating keeps the bird's
+        # position at the center of the result
+        reach = size + 12
+        surface = pygame.Surface((reach * 2, reach * 2), pygame.SRCALPHA)
+        x = y = reach
+
+        # Bird body
+        pygame.draw.ellipse(surface, BIRD_YELLOW, (x - size, y - size//2, size * 2, size))
+        pygame.draw.ellipse(surface, BIRD_ORANGE, (x - size + 3, y - size//2 + 2, size * 2 - 6, size - 4))
+
+        # Wing animation
+        wing_flap = math.sin(math.radians(wing_frame * 360 / WING_FRAMES)) * 10
+        wing_y = y - 8 + wing_flap
+
+        pygame.draw.ellipse(surface, BIRD_RED, (x - 18, wing_y - 10, 25, 18))
+        pygame.draw.ellipse(surface, BIRD_ORANGE, (x - 15, wing_y - 8, 20, 14))
+
+        # Eye
+        eye_x, eye_y = x + 8, y - 5
+        pygame.draw.circle(surface, WHITE, (eye_x, eye_y), 7)
+        pygame.draw.circle(surface, BLACK, (eye_x + 2, eye_y), 4)
+        pygame.draw.circle(surface, WHITE, (eye_x + 3, eye_y - 1), 1)
+
+        # Beak
+        beak_points = [
+            (x + size - 3, y - 2),
+            (x + size + 8, y + 2),
+            (x + size - 3, y + 6)
+        ]
+        pygame.draw.polygon(surface, BIRD_ORANGE, beak_points)
+        pygame.draw.polygon(surface, BIRD_RED, beak_points, 1)
+
+        # Tail
+        tail_points = [
+            (x - size + 2, y),
+            (x - size - 8, y - 6),
+            (x - size - 8, y + 6)
+        ]
+        pygame.draw.polygon(surface, BIRD_RED, tail_points)
+
+        if tilt:
+            # Positive tilt is nose down, which is clockwise on screen
+            surface = pygame.transform.rotozoom(surface, -tilt, 1)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        return surface
+
+    def get_trail(self, size, alpha):
+        key = (size, alpha)
+        surface = self.trail_dots.get(key)
+        if surface is None:
+            surface = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surface, (*BIRD_YELLOW, alpha), (size, size), size)
+            self.trail_dots[key] = surface
+        return surface
+
+    def get_shield(self, size, alpha):
+        alpha -= alpha % SHIELD_ALPHA_STEP
+        key = (size, alpha)
+        surface = self.shields.get(key)
+        if surface is None:
+            surface = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surface, (*POWER_UP_PURPLE, alpha), (size, size), size, 3)
+            self.shields[key] = surface
+        return surface
+
+bird_atlas = BirdAtlas()
+
+class TextCache:
+    # LRU cache of rendered strings. Outlined text is composited once, and
+    # numbers are assembled from per-digit glyphs so a new score costs a few
+    # blits instead of a fresh render.
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+
+    def lookup(self, key):
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def store(self, key, surface):
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def render(self, font, text, color, outline=None, alpha=255):
+        key = (font, text, color, outline, alpha)
+        surface = self.lookup(key)
+        if surface is not None:
+            return surface
+
+        if alpha < 255:
+            surface = self.render(font, text, color, outline).copy()
+            surface.set_alpha(alpha)
+        elif outline is not None:
+            surface = self.halo(font, text, outline).copy()
+            surface.blit(self.render(font, text, color), (OUTLINE_WIDTH, OUTLINE_WIDTH))
+        else:
+            surface = font.render(text, True, color)
+        return self.store(key, surface)
+
+    def halo(self, font, text, color):
+        # The text stamped at every offset around itself, i.e. an outline
+        # with the text's own position left for the fill
+        key = ('halo', font, text, color)
+        surface = self.lookup(key)
+        if surface is not None:
+            return surface
+
+        text_surface = font.render(text, True, color)
+        w, h = text_surface.get_size()
+        surface = pygame.Surface((w + OUTLINE_WIDTH * 2, h + OUTLINE_WIDTH * 2), pygame.SRCALPHA)
+        offsets = range(-OUTLINE_WIDTH, OUTLINE_WIDTH + 1)
+        surface.blits([(text_surface, (OUTLINE_WIDTH + dx, OUTLINE_WIDTH + dy))
+                       for dx in offsets for dy in offsets if dx != 0 or dy != 0], doreturn=False)
+        return self.store(key, surface)
+
+    def draw_number(self, screen, font, number, color, outline, center_x, y):
+        digits = str(number)
+        glyphs = [self.render(font, digit, color) for digit in digits]
+        halos = [self.halo(font, digit, outline) for digit in digits]
+
+        # font.size only measures, so glyphs land where a full render would
+        # have put them
+        x = center_x - font.size(digits)[0] // 2
+        positions = [x + font.size(digits[:i])[0] for i in range(len(digits))]
+
+        # All outlines first so no outline covers a neighbouring digit
+        screen.blits([(halo, (gx - OUTLINE_WIDTH, y - OUTLINE_WIDTH)) for halo, gx in zip(halos, positions)],
+                     doreturn=False)
+        screen.blits([(glyph, (gx, y)) for glyph, gx in zip(glyphs, positions)], doreturn=False)
+
+text_cache = TextCache()
+
+def blit_centered(screen, surface, y):
+    screen.blit(surface, (WIDTH//2 - surface.get_width()//2, y))
 
 # Enhanced background drawing functions
 def draw_mountain(screen, x, y, time_of_day):
@@ -510,12 +1987,36 @@ def draw_cloud_bg(screen, x, y, time_of_day):
 
 def draw_star(screen, x, y, time_of_day):
     if time_of_day < 0.3 or time_of_day > 0.7:  # Only show at night
-        twinkle = math.sin(pygame.time.get_ticks() * 0.01 + x * 0.1) * 0.5 + 0.5
+        # perf_counter rather than pygame.time.get_ticks(), which stays at 0
+        # unless something starts SDL's timer
+        twinkle = math.sin(time.perf_counter() * 10 + x * 0.1) * 0.5 + 0.5
         size = int(2 + twinkle * 2)
         color = (255, 255, int(200 + twinkle * 55))
         pygame.draw.circle(screen, color, (int(x), int(y)), size)
 
-def draw_background(screen, time_system, season_system, bg_layers, weather):
+ground_strips = {}
+
+def get_ground_strip(grass_color):
+    strip = ground_strips.get(grass_color)
+    if strip is None:
+        strip = pygame.Surface((WIDTH, GROUND_HEIGHT))
+        strip.fill(GROUND_BROWN)
+
+        # Grass with texture
+        pygame.draw.rect(strip, grass_color, (0, 0, WIDTH, 20))
+
+        # Blade heights come from a fixed seed so the grass doesn't flicker
+        blades = random.Random(GRASS_SEED)
+        for i in range(0, WIDTH, 10):
+            grass_height = blades.randint(15, 25)
+            pygame.draw.line(strip, tuple(max(0, c - 20) for c in grass_color),
+                            (i, 0), (i, grass_height), 2)
+        if pygame.display.get_surface() is not None:
+            strip = strip.convert()
+        ground_strips[grass_color] = strip
+    return strip
+
+def get_sky_color(time_system, weather):
     sky_color = time_system.get_sky_color()
 
     # Adjust sky color based on weather
@@ -523,110 +2024,82 @@ def draw_background(screen, time_system, season_system, bg_layers, weather):
         sky_color = tuple(max(0, c - 30) for c in sky_color)
     elif weather.weather_type == 'rain':
         sky_color = tuple(max(0, c - 20) for c in sky_color)
+    return sky_color
+
+def draw_background(screen, time_system, season_system, bg_layers, weather):
+    draw_static_background(screen, time_system, season_system, bg_layers, weather)
+    for layer in bg_layers:
+        layer.draw_animated(screen, time_system.time_of_day)
 
+def draw_static_background(screen, time_system, season_system, bg_layers, weather):
     # Gradient sky
-    for y in range(HEIGHT - GROUND_HEIGHT):
-        color_ratio = y / (HEIGHT - GROUND_HEIGHT)
-        r = int(sky_color[0] + (255 - sky_color[0]) * color_ratio * 0.3)
-        g = int(sky_color[1] + (255 - sky_color[1]) * color_ratio * 0.3)
-        b = int(sky_color[2] + (255 - sky_color[2]) * color_ratio * 0.1)
-        pygame.draw.line(screen, (r, g, b), (0, y), (WIDTH, y))
+    screen.blit(sky_cache.get(get_sky_color(time_system, weather)), (0, 0))
 
     # Draw parallax layers
     for layer in bg_layers:
-        layer.draw(screen, time_system.time_of_day)
+        layer.draw_static(screen, time_system.time_of_day)
 
     # Ground
     season_mods = season_system.get_season_modifiers()
-    ground_rect = pygame.Rect(0, HEIGHT - GROUND_HEIGHT, WIDTH, GROUND_HEIGHT)
-    pygame.draw.rect(screen, GROUND_BROWN, ground_rect)
-
-    # Grass with texture
-    grass_rect = pygame.Rect(0, HEIGHT - GROUND_HEIGHT, WIDTH, 20)
-    pygame.draw.rect(screen, season_mods['grass_color'], grass_rect)
-
-    # Add some grass texture
-    for i in range(0, WIDTH, 10):
-        grass_height = random.randint(15, 25)
-        pygame.draw.line(screen, tuple(max(0, c - 20) for c in season_mods['grass_color']),
-                        (i, HEIGHT - GROUND_HEIGHT), (i, HEIGHT - GROUND_HEIGHT + grass_height), 2)
+    screen.blit(get_ground_strip(season_mods['grass_color']), (0, HEIGHT - GROUND_HEIGHT))
 
 def draw_score(screen, score):
-    score_text = big_font.render(str(score), True, WHITE)
-    score_outline = big_font.render(str(score), True, BLACK)
-
-    # Draw outline
-    for dx in [-2, -1, 0, 1, 2]:
-        for dy in [-2, -1, 0, 1, 2]:
-            if dx != 0 or dy != 0:
-                screen.blit(score_outline, (WIDTH//2 - score_outline.get_width()//2 + dx, 50 + dy))
-
-    screen.blit(score_text, (WIDTH//2 - score_text.get_width()//2, 50))
+    text_cache.draw_number(screen, big_font, score, WHITE, BLACK, WIDTH//2, 50)
 
 def draw_season_indicator(screen, season):
     season_icons = {'spring': '🌸', 'summer': '☀️', 'fall': '🍂', 'winter': '❄️'}
-    season_text = small_font.render(f"{season_icons.get(season, '')} {season.title()}", True, WHITE)
+    season_text = text_cache.render(small_font, f"{season_icons.get(season, '')} {season.title()}", WHITE)
     screen.blit(season_text, (10, 10))
 
 def draw_weather_indicator(screen, weather):
     if weather.weather_type != 'clear':
         weather_icons = {'rain': '🌧️', 'snow': '❄️', 'fog': '🌫️'}
-        weather_text = small_font.render(f"{weather_icons.get(weather.weather_type, '')} {weather.weather_type.title()}", True, WHITE)
+        weather_text = text_cache.render(small_font, f"{weather_icons.get(weather.weather_type, '')} {weather.weather_type.title()}", WHITE)
         screen.blit(weather_text, (10, 30))
 
+def draw_shield_timer(screen, shield_time):
+    shield_text = text_cache.render(small_font, f'Shield: {shield_time//60 + 1}s', POWER_UP_PURPLE)
+    screen.blit(shield_text, (10, HEIGHT - 30))
+
+def draw_assist_indicator(screen):
+    assist_text = text_cache.render(small_font, 'Assist (A)', GOLD)
+    screen.blit(assist_text, (WIDTH - assist_text.get_width() - 10, HEIGHT - 30))
+
 def draw_score_popup(screen, x, y, points, timer):
     if timer > 0:
         alpha = int(255 * (timer / 60))
+        alpha -= alpha % POPUP_ALPHA_STEP
         popup_y = y - (60 - timer)
 
         score_text = f"+{points}"
         color = STAR_YELLOW if points > 1 else WHITE
 
-        text_surface = font.render(score_text, True, color)
-        s = pygame.Surface(text_surface.get_size(), pygame.SRCALPHA)
-        s.set_alpha(alpha)
-        s.blit(text_surface, (0, 0))
-        screen.blit(s, (x - text_surface.get_width()//2, popup_y))
+        text_surface = text_cache.render(font, score_text, color, alpha=alpha)
+        screen.blit(text_surface, (x - text_surface.get_width()//2, popup_y))
 
 def draw_game_over(screen, score, high_score, game_state):
     overlay = pygame.Surface((WIDTH, HEIGHT))
     overlay.set_alpha(128)
     overlay.fill(BLACK)
     screen.blit(overlay, (0, 0))
-    game_over_text = big_font.render('Game Over!', True, WHITE)
-    screen.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, HEIGHT//2 - 100))
-
-    score_text = font.render(f'Score: {score}', True, WHITE)
-    screen.blit(score_text, (WIDTH//2 - score_text.get_width()//2, HEIGHT//2 - 40))
+    blit_centered(screen, text_cache.render(big_font, 'Game Over!', WHITE), HEIGHT//2 - 100)
+    blit_centered(screen, text_cache.render(font, f'Score: {score}', WHITE), HEIGHT//2 - 40)
 
     if score > high_score:
-        new_record_text = font.render('NEW HIGH SCORE!', True, GOLD)
-        screen.blit(new_record_text, (WIDTH//2 - new_record_text.get_width()//2, HEIGHT//2 - 10))
-        high_score_text = font.render(f'High Score: {score}', True, GOLD)
+        blit_centered(screen, text_cache.render(font, 'NEW HIGH SCORE!', GOLD), HEIGHT//2 - 10)
+        high_score_text = text_cache.render(font, f'High Score: {score}', GOLD)
     else:
-        high_score_text = font.render(f'High Score: {high_score}', True, WHITE)
-
-    screen.blit(high_score_text, (WIDTH//2 - high_score_text.get_width()//2, HEIGHT//2 + 20))
-
-    restart_text = font.render('Press SPACE to play again', True, SOFT_PINK)
-    screen.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, HEIGHT//2 + 60))
+        high_score_text = text_cache.render(font, f'High Score: {high_score}', WHITE)
 
-    stats_text = small_font.render(f'Games Played: {game_state.games_played}', True, WHITE)
-    screen.blit(stats_text, (WIDTH//2 - stats_text.get_width()//2, HEIGHT//2 + 100))
+    blit_centered(screen, high_score_text, HEIGHT//2 + 20)
+    blit_centered(screen, text_cache.render(font, 'Press SPACE to play again', SOFT_PINK), HEIGHT//2 + 60)
+    blit_centered(screen, text_cache.render(small_font, f'Games Played: {game_state.games_played}', WHITE), HEIGHT//2 + 100)
 
     if game_state.games_played > 0:
         avg_score = game_state.total_score / game_state.games_played
-        avg_text = small_font.render(f'Average Score: {avg_score:.1f}', True, WHITE)
-        screen.blit(avg_text, (WIDTH//2 - avg_text.get_width()//2, HEIGHT//2 + 120))
-
-def main():
-    clock = pygame.time.Clock()
-    sound_manager = SoundManager()
-    weather_system = WeatherSystem()
-    time_system = TimeSystem()
-    season_system = SeasonSystem()
-    game_state = GameState()
+        blit_centered(screen, text_cache.render(small_font, f'Average Score: {avg_score:.1f}', WHITE), HEIGHT//2 + 120)
 
+def make_background_layers():
     bg_elements_far = [
         {'x': 100, 'y': 250, 'draw_func': draw_mountain},
         {'x': 300, 'y': 280, 'draw_func': draw_mountain},
@@ -637,9 +2110,9 @@ def main():
         {'x': 50, 'y': 100, 'draw_func': draw_cloud_bg},
         {'x': 200, 'y': 80, 'draw_func': draw_cloud_bg},
         {'x': 400, 'y': 120, 'draw_func': draw_cloud_bg},
-        {'x': 150, 'y': 50, 'draw_func': draw_star},
-        {'x': 350, 'y': 70, 'draw_func': draw_star},
-        {'x': 500, 'y': 40, 'draw_func': draw_star},
+        {'x': 150, 'y': 50, 'draw_func': draw_star, 'animated': True},
+        {'x': 350, 'y': 70, 'draw_func': draw_star, 'animated': True},
+        {'x': 500, 'y': 40, 'draw_func': draw_star, 'animated': True},
     ]
 
     bg_elements_close = [
@@ -648,204 +2121,491 @@ def main():
         {'x': 550, 'y': HEIGHT - GROUND_HEIGHT, 'draw_func': draw_tree},
     ]
 
-    bg_layers = [
+    return [
         BackgroundLayer(bg_elements_far, 0.2, (200, 300)),
         BackgroundLayer(bg_elements_mid, 0.5, (50, 150)),
         BackgroundLayer(bg_elements_close, 0.8, (HEIGHT - GROUND_HEIGHT - 50, HEIGHT - GROUND_HEIGHT)),
     ]
 
-    bird = Bird()
-    pipes = []
-    power_ups = []
-    particles = []
-    score = 0
-    game_over = False
-    pipe_timer = 0
-    score_popup_timer = 0
-    score_popup_points = 0
-    score_popup_x = 0
-    score_popup_y = 0
+@contextmanager
+def interpolated_positions(sim, bg_layers, alpha):
+    # Temporarily moves everything that scrolls or falls to where it would be
+    # between the last two simulation steps
+    bird = sim.bird
+    moved = [(bird, 'y', bird.prev_y)]
+    moved += [(pipe, 'x', pipe.prev_x) for pipe in sim.pipes]
+    moved += [(power_up, 'x', power_up.prev_x) for power_up in sim.power_ups]
+    moved += [(layer, 'x_offset', layer.prev_x_offset) for layer in bg_layers]
+    saved = [getattr(obj, name) for obj, name, _ in moved]
+    for (obj, name, prev), current in zip(moved, saved):
+        setattr(obj, name, prev + (current - prev) * alpha)
+    try:
+        yield
+    finally:
+        for (obj, name, _), current in zip(moved, saved):
+            setattr(obj, name, current)
+
+class ScaledCanvas:
+    # Stands in for the screen at 1/factor of its resolution: blit() and
+    # blits() take screen coordinates and draw downscaled copies of the
+    # sprites, cached for as long as the sprite itself lives. Only the blits
+    # used by the world drawing are supported, not pygame.draw.
+    def __init__(self, screen, factor):
+        self.screen = screen
+        self.factor = factor
+        width, height = screen.get_size()
+        self.surface = pygame.Surface((width // factor, height // factor), 0, screen)
+        self.sprites = weakref.WeakKeyDictionary()
+
+    def scaled(self, sprite):
+        small = self.sprites.get(sprite)
+        if small is None:
+            width, height = sprite.get_size()
+            small = self.sprites[sprite] = pygame.transform.scale(
+                sprite, (max(1, round(width / self.factor)), max(1, round(height / self.factor))))
+        return small
+
+    def blit(self, sprite, dest):
+        self.surface.blit(self.scaled(sprite), (dest[0] / self.factor, dest[1] / self.factor))
+
+    def blits(self, sequence, doreturn=True):
+        scaled = self.scaled
+        factor = self.factor
+        self.surface.blits([(scaled(sprite), (dest[0] / factor, dest[1] / factor)) for sprite, dest in sequence],
+                           doreturn=False)
+
+    def present(self):
+        # Nearest-neighbour, which keeps the pixel-art edges crisp
+        pygame.transform.scale(self.surface, self.screen.get_size(), self.screen)
+
+class Renderer:
+    # Draws a Simulation and owns the purely visual state on top of it:
+    # parallax layers, particles and the score popup.
+    def __init__(self, screen, scroll_background=True):
+        self.screen = screen
+        self.scroll_background = scroll_background
+        self.bg_layers = make_background_layers()
+        self.particles = ParticlePool()
+        self.assist = False  # Shows the assist indicator
+        self.set_quality(0)
+        self.reset()
+
+    def set_quality(self, tier):
+        self.tier = tier
+        self.quality = quality = QUALITY_TIERS[tier]
+        self.particles.limit = quality['particles']
+        for layer in self.bg_layers:
+            layer.bake_animated = quality['bake_stars']
+        # The HUD is drawn after scaling up, at full resolution
+        self.canvas = ScaledCanvas(self.screen, quality['scale']) if quality['scale'] > 1 else None
+
+    def reset(self, seed=None):
+        self.particles.clear()
+        self.particles.rng = np.random.default_rng(seed)
+        self.score_popup_timer = 0
+        self.score_popup_points = 0
+        self.score_popup_x = 0
+        self.score_popup_y = 0
+
+    def show_popup(self, points, x, y):
+        self.score_popup_timer = 60
+        self.score_popup_points = points
+        self.score_popup_x = x
+        self.score_popup_y = y
+
+    POPUP_STATE = struct.Struct('<iidd')
+
+    def snapshot(self):
+        # Particles and the score popup, to go with Simulation.snapshot()
+        return self.POPUP_STATE.pack(self.score_popup_timer, self.score_popup_points,
+                                     self.score_popup_x, self.score_popup_y) + self.particles.pack()
+
+    def restore(self, data):
+        (self.score_popup_timer, self.score_popup_points,
+         self.score_popup_x, self.score_popup_y) = self.POPUP_STATE.unpack_from(data)
+        self.particles.unpack(data, self.POPUP_STATE.size)
+
+    def handle_event(self, event):
+        kind = event[0]
+        if kind == 'score':
+            _, points, x, y = event
+            self.show_popup(points, x, y - 30)
+            self.particles.burst(x, y, STAR_YELLOW, 5, 20, (-2, 2), (-3, -1))
+        elif kind == 'star':
+            _, points, x, y = event
+            self.show_popup(points, x, y)
+            self.particles.burst(x, y, STAR_YELLOW, 10, 30, (-4, 4), (-5, -1))
+        elif kind == 'shield':
+            _, x, y = event
+            self.particles.burst(x, y, POWER_UP_PURPLE, 8, 25, (-3, 3), (-4, -1))
+
+    def update(self, sim):
+        sim.weather.update()
+
+        if self.scroll_background:
+            for layer in self.bg_layers:
+                layer.update(PIPE_SPEED)
+
+        self.particles.update()
+
+        if self.score_popup_timer > 0:
+            self.score_popup_timer -= 1
+
+    def draw(self, sim, game_state, alpha=1.0):
+        # alpha is how far the render time is between the previous and the
+        # current simulation step
+        if alpha >= 1.0:
+            self.draw_frame(sim, game_state)
+        else:
+            with interpolated_positions(sim, self.bg_layers, alpha):
+                self.draw_frame(sim, game_state)
+
+        if profiler.show_overlay:
+            profiler.draw(self.screen)
+
+    def draw_frame(self, sim, game_state):
+        screen = self.canvas or self.screen
+        with profiler.span('draw.background'):
+            draw_background(screen, sim.time_system, sim.season_system, self.bg_layers, sim.weather)
+        self.draw_world(sim, screen)
+        if self.canvas:
+            with profiler.span('draw.upscale'):
+                self.canvas.present()
+        self.draw_hud(sim, game_state)
+
+    def draw_world(self, sim, screen):
+        season_modifiers = sim.season_system.get_season_modifiers()
+        with profiler.span('draw.pipes'):
+            for pipe in sim.pipes:
+                pipe.draw(screen, season_modifiers['pipe_color'])
+
+        with profiler.span('draw.power_ups'):
+            for power_up in sim.power_ups:
+                if not power_up.collected:
+                    power_up.draw(screen)
+
+        with profiler.span('draw.particles'):
+            self.particles.draw(screen)
+
+        with profiler.span('draw.bird'):
+            sim.bird.draw(screen, self.quality['trail'])
+
+        with profiler.span('draw.weather'):
+            sim.weather.draw(screen, self.quality['weather'])
+
+    def draw_hud(self, sim, game_state):
+        with profiler.span('draw.hud'):
+            self.draw_hud_text(sim, game_state)
+
+    def draw_hud_text(self, sim, game_state):
+        screen = self.screen
+        draw_score(screen, sim.score)
+        draw_season_indicator(screen, sim.season_system.current_season)
+        draw_weather_indicator(screen, sim.weather)
+
+        if self.score_popup_timer > 0:
+            draw_score_popup(screen, self.score_popup_x, self.score_popup_y,
+                             self.score_popup_points, self.score_popup_timer)
+
+        if sim.bird.invincible:
+            draw_shield_timer(screen, sim.bird.shield_time)
+
+        if self.assist:
+            draw_assist_indicator(screen)
+
+        if sim.game_over:
+            draw_game_over(screen, sim.score, game_state.high_score, game_state)
+
+    def present(self):
+        pygame.display.flip()
 
-    weather_timer = 0
+class DirtyRectRenderer(Renderer):
+    # Keeps the static background in an offscreen surface and, while it stays
+    # unchanged, only erases, redraws and pushes the regions covered by the
+    # bird, pipes, power-ups, particles, stars and HUD. Scrolling layers,
+    # palette changes, weather and the game-over overlay fall back to a full
+    # flip. It always draws at full resolution; the scale of the lowest
+    # quality tiers does not apply.
+    def __init__(self, screen, scroll_background=True):
+        self.background = pygame.Surface(screen.get_size()).convert()
+        self.background_key = None
+        self.previous_rects = []
+        self.update_rects = None
+        self.overlay_shown = False
+        super().__init__(screen, scroll_background)
+
+    def reset(self, seed=None):
+        super().reset(seed)
+        self.background_key = None
+
+    def set_quality(self, tier):
+        super().set_quality(tier)
+        self.canvas = None
+        self.background_key = None
+
+    def get_background_key(self, sim):
+        return (sky_cache.key(get_sky_color(sim.time_system, sim.weather)),
+                time_of_day_bucket(sim.time_system.time_of_day),
+                sim.season_system.current_season,
+                tuple(layer.x_offset for layer in self.bg_layers))
+
+    def get_dirty_rects(self, sim):
+        rects = [pipe.get_draw_rect() for pipe in sim.pipes]
+        rects += [power_up.get_draw_rect() for power_up in sim.power_ups if not power_up.collected]
+        rects.append(sim.bird.get_draw_rect())
+        particle_bounds = self.particles.get_bounds()
+        if particle_bounds is not None:
+            rects.append(particle_bounds)
+        for layer in self.bg_layers:
+            rects += layer.get_animated_rects()
+
+        # HUD text: score band, indicators, shield timer, assist and popup
+        rects.append(pygame.Rect(0, 50 - OUTLINE_WIDTH, WIDTH, big_font.get_linesize() + OUTLINE_WIDTH * 2))
+        rects.append(pygame.Rect(0, 10, WIDTH // 2, 20 + small_font.get_linesize()))
+        rects.append(pygame.Rect(0, HEIGHT - 30, WIDTH, small_font.get_linesize()))
+        if self.score_popup_timer > 0:
+            popup_y = self.score_popup_y - (60 - self.score_popup_timer)
+            rects.append(pygame.Rect(self.score_popup_x - WIDTH // 4, popup_y, WIDTH // 2, font.get_linesize()))
+        if profiler.show_overlay:
+            rects.append(profiler.get_overlay_rect())
+        return rects
+
+    def draw_frame(self, sim, game_state):
+        if self.overlay_shown != profiler.show_overlay:
+            # The profiler overlay was toggled: repaint everything once
+            self.overlay_shown = profiler.show_overlay
+            self.background_key = None
+
+        key = self.get_background_key(sim)
+        full = key != self.background_key or sim.weather.weather_type != 'clear'
+
+        if sim.game_over:
+            # Nothing moves behind the overlay after the first frame
+            if self.background_key == 'game_over':
+                self.update_rects = [profiler.get_overlay_rect()] if profiler.show_overlay else []
+                return
+            key = 'game_over'
+            full = True
+
+        rects = self.get_dirty_rects(sim)
+        if full:
+            if key != self.background_key and key != 'game_over':
+                draw_static_background(self.background, sim.time_system, sim.season_system,
+                                       self.bg_layers, sim.weather)
+            self.background_key = key
+            self.screen.blit(self.background, (0, 0))
+            self.update_rects = None
+        else:
+            # Erase both where things were and where they are about to be, so
+            # translucent sprites never blend over an old copy of themselves
+            self.update_rects = self.previous_rects + rects
+            self.screen.blits([(self.background, rect, rect) for rect in self.update_rects], doreturn=False)
+
+        with profiler.span('draw.stars'):
+            for layer in self.bg_layers:
+                layer.draw_animated(self.screen, sim.time_system.time_of_day)
+        self.draw_world(sim, self.screen)
+        self.draw_hud(sim, game_state)
+        self.previous_rects = rects
+
+    def present(self):
+        if self.update_rects is None:
+            pygame.display.flip()
+        elif self.update_rects:
+            pygame.display.update(self.update_rects)
+
+def seed_value(text):
+    seed = int(text)
+    if not 0 <= seed < 2 ** 64:
+        raise argparse.ArgumentTypeError(f'{seed} is not between 0 and 2**64 - 1')
+    return seed
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Flappy Bird for Kids')
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help='only push changed screen regions (for software-rendered displays)')
+    parser.add_argument('--static-background', action='store_true',
+                        help='do not scroll the parallax layers, so dirty-rect mode rarely needs a full flip')
+    parser.add_argument('--fps', type=int, default=60,
+                        help='render frame rate cap, e.g. 120 or 144 (0 for uncapped); gameplay speed does not change')
+    parser.add_argument('--seed', type=seed_value,
+                        help='seed every game with this value (0 to 2**64 - 1) so runs are reproducible')
+    parser.add_argument('--record', metavar='PATH',
+                        help='save a replay of each finished game; {n} in PATH is replaced by the game number')
+    parser.add_argument('--replay', metavar='PATH',
+                        help='play back a recorded game frame for frame (SPACE restarts it)')
+    parser.add_argument('--profile', action='store_true',
+                        help='record frame timing spans from the start (F3 toggles the frame-time graph)')
+    parser.add_argument('--trace', metavar='PATH', default='frame_trace.json',
+                        help='Chrome/Perfetto trace file for frames over budget, written on exit')
+    parser.add_argument('--capture', metavar='PATH',
+                        help='record every frame, as PNGs into directory PATH or as raw RGB24 video if PATH ends in .raw')
+    parser.add_argument('--serve', metavar='ADDRESS',
+                        help="stream the game to spectator.py viewers on 'host:port', 'port' or 'unix:/path'")
+    parser.add_argument('--quality', choices=['auto'] + [str(tier) for tier in range(len(QUALITY_TIERS))],
+                        default='auto',
+                        help=f'render quality from 0 (full) to {len(QUALITY_TIERS) - 1} (lowest), '
+                             'or auto to lower and raise it with the measured frame time (default)')
+    parser.add_argument('--assist', action='store_true',
+                        help='let the autopilot fly the bird; your own flaps still count (A toggles it)')
+    parser.add_argument('--latency', action='store_true',
+                        help='print the time from SPACE press to the first frame showing the flap on exit')
+    parser.add_argument('--startup-time', action='store_true',
+                        help='print how long the window took to show its first frame')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    started = time.perf_counter()
+    args = parse_args(argv)
+    screen = init_display()
+    display_ready = time.perf_counter()
+    pacer = FramePacer(args.fps)
+    sound_manager = SoundManager()
+    game_state = GameState()
+    playback = Replay.load(args.replay) if args.replay else None
+    seed = playback.seed if playback else args.seed
+    sim = Simulation(seed)
+    renderer_class = DirtyRectRenderer if args.dirty_rects else Renderer
+    renderer = renderer_class(screen, scroll_background=not args.static_background)
+    renderer.reset(sim.seed)
+    autopilot = Autopilot()
+    assist = renderer.assist = args.assist and not playback
+    event_sounds = {'jump': 'jump', 'score': 'score', 'star': 'powerup', 'shield': 'powerup'}
+    recording = Replay(sim.seed)
+    games = 1
+    recorder = FrameRecorder(args.capture, screen) if args.capture else None
+    broadcaster = None
+    if args.serve:
+        # Imported here because spectator imports this module
+        from spectator import Broadcaster
+        broadcaster = Broadcaster(args.serve)
+
+    sim_step_ms = 1000 / SIM_HZ
+    accumulator = 0.0
+    presses = deque()  # Press times of flaps not applied yet
+    latency = LatencyProbe()
+    profiler.budget_ms = 1000 / (args.fps or SIM_HZ)
+    profiler.enabled = args.profile
+    governor = None
+    if args.quality == 'auto':
+        governor = QualityGovernor(profiler.budget_ms)
+    else:
+        renderer.set_quality(int(args.quality))
 
+    first_frame = True
     running = True
     while running:
-        dt = clock.tick(60)
+        elapsed_ms, events = pacer.wait()
+        accumulator += elapsed_ms
+        frame_start = pacer.frame_start
+        profiler.begin_frame()
 
-        for event in pygame.event.get():
+        profiler.mark('events')
+        for pressed, event in events:
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    if game_over:
-                        bird = Bird()
-                        pipes = []
-                        power_ups = []
-                        particles = []
-                        score = 0
-                        game_over = False
-                        pipe_timer = 0
-                        score_popup_timer = 0
-                        game_state.games_played += 1
-                        weather_system.set_weather('clear')
-                    else:
-                        bird.jump()
-                        sound_manager.play('jump')
-
-        if not game_over:
-            time_system.update(score)
-            season_system.update(score)
-            season_modifiers = season_system.get_season_modifiers()
-
-            weather_timer += 1
-            if weather_timer > 1800:
-                weather_timer = 0
-                weather_types = ['clear', 'rain', 'snow', 'fog']
-                if random.random() < 0.3:
-                    new_weather = random.choice(weather_types)
-                    weather_system.set_weather(new_weather, random.uniform(0.5, 1.0))
-
-            weather_system.update()
-
-            for layer in bg_layers:
-                layer.update(PIPE_SPEED)
-
-            bird.update(season_modifiers, weather_system, pipes)
-
-            if bird.y > HEIGHT - GROUND_HEIGHT - bird.size or bird.y < -bird.size:
-                game_over = True
-                game_state.save_high_score(score)
-                game_state.total_score += score
-
-            pipe_timer += 1
-            if pipe_timer > 90:
-                pipes.append(Pipe(WIDTH))
-                pipe_timer = 0
-
-                if random.random() < POWER_UP_CHANCE:
-                    power_type = random.choice(['star', 'shield'])
-                    power_y = random.randint(100, HEIGHT - GROUND_HEIGHT - 100)
-                    power_ups.append(PowerUp(WIDTH + 150, power_y, power_type))
-
-            for pipe in pipes[:]:
-                pipe.update()
-
-                if not pipe.scored and pipe.x + PIPE_WIDTH < bird.x:
-                    pipe.scored = True
-                    points = 1
-
-                    if season_system.current_season == 'winter':
-                        points = 2
-                    elif weather_system.weather_type == 'fog':
-                        points = 3
-
-                    score += points
-                    score_popup_timer = 60
-                    score_popup_points = points
-                    score_popup_x = bird.x
-                    score_popup_y = bird.y - 30
-                    sound_manager.play('score')
-
-                    for _ in range(5):
-                        particles.append(Particle(
-                            bird.x + random.randint(-20, 20),
-                            bird.y + random.randint(-20, 20),
-                            STAR_YELLOW,
-                            (random.uniform(-2, 2), random.uniform(-3, -1))
-                        ))
-
-                if not bird.invincible:
-                    bird_rect = bird.get_collision_rect()
-                    for pipe_rect in pipe.get_rects():
-                        if bird_rect.colliderect(pipe_rect):
-                            game_over = True
-                            game_state.save_high_score(score)
-                            game_state.total_score += score
-                            break
-
-                if pipe.is_off_screen():
-                    pipes.remove(pipe)
-
-            for power_up in power_ups[:]:
-                power_up.update()
-
-                if bird.get_rect().colliderect(power_up.get_rect()) and not power_up.collected:
-                    power_up.collected = True
-                    sound_manager.play('powerup')
-
-                    if power_up.power_type == 'star':
-                        bonus_points = 5
-                        score += bonus_points
-                        score_popup_timer = 60
-                        score_popup_points = bonus_points
-                        score_popup_x = power_up.x
-                        score_popup_y = power_up.y
-
-                        for _ in range(10):
-                            particles.append(Particle(
-                                power_up.x + random.randint(-30, 30),
-                                power_up.y + random.randint(-30, 30),
-                                STAR_YELLOW,
-                                (random.uniform(-4, 4), random.uniform(-5, -1))
-                            ))
-
-                    elif power_up.power_type == 'shield':
-                        bird.shield_time = 300
-
-                        for _ in range(8):
-                            particles.append(Particle(
-                                power_up.x + random.randint(-25, 25),
-                                power_up.y + random.randint(-25, 25),
-                                POWER_UP_PURPLE,
-                                (random.uniform(-3, 3), random.uniform(-4, -1))
-                            ))
-
-                    power_ups.remove(power_up)
-                elif power_up.is_off_screen():
-                    power_ups.remove(power_up)
-
-            for particle in particles[:]:
-                particle.update()
-                if particle.life <= 0:
-                    particles.remove(particle)
-
-            if score_popup_timer > 0:
-                score_popup_timer -= 1
-
-        draw_background(screen, time_system, season_system, bg_layers, weather_system)
-
-        season_modifiers = season_system.get_season_modifiers()
-        for pipe in pipes:
-            pipe.draw(screen, season_modifiers['pipe_color'])
-
-        for power_up in power_ups:
-            if not power_up.collected:
-                power_up.draw(screen)
-
-        for particle in particles:
-            particle.draw(screen)
-
-        bird.draw(screen)
-
-        weather_system.draw(screen)
-
-        draw_score(screen, score)
-        draw_season_indicator(screen, season_system.current_season)
-        draw_weather_indicator(screen, weather_system)
-
-        if score_popup_timer > 0:
-            draw_score_popup(screen, score_popup_x, score_popup_y, score_popup_points, score_popup_timer)
-
-        if bird.invincible:
-            shield_text = small_font.render(f'Shield: {bird.shield_time//60 + 1}s', True, POWER_UP_PURPLE)
-            screen.blit(shield_text, (10, HEIGHT - 30))
-
-        if game_over:
-            draw_game_over(screen, score, game_state.high_score, game_state)
-
-        pygame.display.flip()
-
+                if event.key == pygame.K_F3:
+                    profiler.toggle_overlay()
+                elif event.key == pygame.K_a and not playback:
+                    assist = renderer.assist = not assist
+                elif event.key == pygame.K_SPACE:
+                    if sim.game_over:
+                        sim.reset(seed)
+                        renderer.reset(sim.seed)
+                        recording = Replay(sim.seed)
+                        games += 1
+                        presses.clear()
+                        latency.reset()
+                    elif not playback:
+                        presses.append(pressed)
+        profiler.mark(None)
+
+        steps = 0
+        while accumulator >= sim_step_ms:
+            if steps == MAX_SIM_STEPS_PER_FRAME:
+                # Too far behind: skip the backlog rather than spiral
+                accumulator = 0.0
+                break
+            accumulator -= sim_step_ms
+            steps += 1
+            if sim.game_over:
+                continue
+
+            # The steps of a frame catch up on the time since the last one, so
+            # each covers a slice of the past; a press goes to the step whose
+            # slice it fell in. The frame's last step also takes the presses
+            # after that, rather than leaving them for the next frame.
+            if accumulator < sim_step_ms:
+                due = frame_start
+            else:
+                due = frame_start - accumulator / 1000
+            flap = False
+            while presses and presses[0] <= due:
+                latency.applied(presses.popleft(), sim.frame + 1)
+                flap = True
+
+            if playback:
+                flap = playback.should_flap(sim.frame + 1)
+            else:
+                if assist and not flap:
+                    with profiler.span('autopilot'):
+                        flap = autopilot.should_flap(sim)
+                if flap:
+                    recording.record(sim.frame + 1)
+
+            with profiler.span('sim.step'):
+                sim_events = sim.step(flap)
+            if broadcaster:
+                with profiler.span('broadcast'):
+                    broadcaster.publish(sim)
+            for event in sim_events:
+                renderer.handle_event(event)
+                if event[0] in event_sounds:
+                    sound_manager.play(event_sounds[event[0]])
+                elif event[0] == 'game_over' and not playback:
+                    game_state.record_game(sim.score, sim.seed, sim.frame)
+                    if args.record:
+                        recording.save(args.record.replace('{n}', str(games)))
+
+            with profiler.span('renderer.update'):
+                renderer.update(sim)
+
+        alpha = 1.0 if sim.game_over else accumulator / sim_step_ms
+        with profiler.span('draw'):
+            renderer.draw(sim, game_state, alpha)
+        with profiler.span('present'):
+            renderer.present()
+        latency.presented(sim.frame)
+        if recorder:
+            with profiler.span('capture'):
+                recorder.capture(screen)
+        profiler.end_frame()
+
+        if governor:
+            tier = governor.update(1000 * (time.perf_counter() - frame_start))
+            if tier != renderer.tier:
+                renderer.set_quality(tier)
+
+        if first_frame:
+            first_frame = False
+            if args.startup_time:
+                print(f'First frame {1000 * (time.perf_counter() - STARTED):.0f} ms after start '
+                      f'(imports {1000 * (IMPORTED - STARTED):.0f} ms, '
+                      f'display and fonts {1000 * (display_ready - started):.0f} ms)')
+
+    if profiler.slow_frames:
+        profiler.save_trace(args.trace)
+        print(f'{len(profiler.slow_frames)} frames over budget written to {args.trace}')
+    if args.latency:
+        print(latency.summary())
+    if broadcaster:
+        broadcaster.close()
+    if recorder:
+        recorder.close()
+        print(f'Captured {recorder.captured} frames to {args.capture}, dropped {recorder.dropped}')
+    game_state.close()
     pygame.quit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,293 @@
+import math
+import random
+
+import numpy as np
+
+import bird
+
+# Runs many games of bird.Simulation at once. Every per-game value lives in
+# a NumPy array with one row per game, and step() applies the same rules as
+# Simulation.step() to all rows in one call.
+
+# Weather and power-up types are stored as their index in bird's lists
+CLEAR, RAIN, SNOW, FOG = map(bird.WEATHER_TYPES.index, ('clear', 'rain', 'snow', 'fog'))
+STAR, SHIELD = map(bird.POWER_UP_TYPES.index, ('star', 'shield'))
+
+
+def season_gravity_table():
+    seasons = bird.SeasonSystem()
+    table = []
+    for season in seasons.seasons:
+        seasons.current_season = season
+        table.append(seasons.get_season_modifiers()['gravity'])
+    return np.array(table)
+
+
+class BatchSimulation:
+    def __init__(self, n, seed=None):
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        # Built here rather than per step; sweeps set GRAVITY before this
+        self.season_gravity = season_gravity_table()
+
+        # Pipes and power-ups only live for a fixed number of frames, so a
+        # few slots per game are enough
+        spawn_interval = 91
+        pipe_life = math.ceil((bird.WIDTH + bird.PIPE_WIDTH) / bird.PIPE_SPEED)
+        power_up_life = math.ceil((bird.WIDTH + 150 + bird.POWER_UP_SIZE) / bird.PIPE_SPEED)
+        self.pipe_slots = pipe_life // spawn_interval + 2
+        self.power_up_slots = power_up_life // spawn_interval + 2
+
+        self.bird_y = np.zeros(n)
+        self.bird_velocity = np.zeros(n)
+        self.shield_time = np.zeros(n, dtype=np.int32)
+        self.invincible = np.zeros(n, dtype=bool)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.frame = np.zeros(n, dtype=np.int64)
+        self.pipe_timer = np.zeros(n, dtype=np.int32)
+        self.weather_timer = np.zeros(n, dtype=np.int32)
+        self.weather = np.zeros(n, dtype=np.int8)
+        self.weather_intensity = np.zeros(n)
+
+        # Pipes are kept in spawn order: slot 0 is the oldest (leftmost) pipe
+        self.pipe_x = np.zeros((n, self.pipe_slots))
+        self.pipe_height = np.zeros((n, self.pipe_slots), dtype=np.int32)
+        self.pipe_active = np.zeros((n, self.pipe_slots), dtype=bool)
+        self.pipe_scored = np.zeros((n, self.pipe_slots), dtype=bool)
+        self.pipe_count = np.zeros(n, dtype=np.int32)
+
+        self.power_up_x = np.zeros((n, self.power_up_slots))
+        self.power_up_y = np.zeros((n, self.power_up_slots), dtype=np.int32)
+        self.power_up_type = np.zeros((n, self.power_up_slots), dtype=np.int8)
+        self.power_up_active = np.zeros((n, self.power_up_slots), dtype=bool)
+
+        self.rows = np.arange(n)
+        self.reset()
+
+    def reset(self, mask=None):
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        self.bird_y[mask] = bird.HEIGHT // 2
+        self.bird_velocity[mask] = 0
+        self.shield_time[mask] = 0
+        self.invincible[mask] = False
+        self.score[mask] = 0
+        self.game_over[mask] = False
+        self.frame[mask] = 0
+        self.pipe_timer[mask] = 0
+        self.weather_timer[mask] = 0
+        self.weather[mask] = CLEAR
+        self.weather_intensity[mask] = 1.0
+        self.pipe_active[mask] = False
+        self.pipe_scored[mask] = False
+        self.pipe_count[mask] = 0
+        self.power_up_active[mask] = False
+
+    def step(self, flap=None):
+        n = self.n
+        rng = self.rng
+        alive = ~self.game_over
+        points = np.zeros(n, dtype=np.int64)
+        if not alive.any():
+            return points, self.game_over
+
+        if flap is not None:
+            jump = alive & flap
+            self.bird_velocity[jump] = bird.JUMP_STRENGTH
+
+        self.frame[alive] += 1
+        season_index = (self.score // 30) % 4
+
+        # Weather changes
+        self.weather_timer[alive] += 1
+        change = alive & (self.weather_timer > 1800)
+        self.weather_timer[change] = 0
+        change &= rng.random(n) < 0.3
+        if change.any():
+            count = int(change.sum())
+            self.weather[change] = rng.integers(0, len(bird.WEATHER_TYPES), count)
+            self.weather_intensity[change] = rng.uniform(0.5, 1.0, count)
+
+        # Bird.update: season gravity, pipe air pressure and snow
+        bird_x = bird.WIDTH // 4
+        gravity = self.season_gravity[season_index]
+        y = self.bird_y
+        for j in range(self.pipe_slots):
+            distance = np.abs(self.pipe_x[:, j] + bird.PIPE_WIDTH / 2 - bird_x)
+            height = self.pipe_height[:, j]
+            near = self.pipe_active[:, j] & (distance < bird.PRESSURE_RANGE) & ((y < height) | (y > height + bird.PIPE_GAP))
+            pressure = (bird.PRESSURE_RANGE - distance) / bird.PRESSURE_RANGE * bird.PRESSURE_STRENGTH
+            gravity = np.where(near, gravity - pressure, gravity)
+
+        snow = self.weather == SNOW
+        gravity = np.where(snow, gravity * bird.SNOW_GRAVITY, gravity)
+        jitter = snow & (rng.random(n) < bird.SNOW_JITTER_CHANCE)
+        velocity = self.bird_velocity
+        velocity = np.where(jitter, velocity + rng.uniform(-bird.SNOW_JITTER, bird.SNOW_JITTER, n), velocity)
+        velocity = velocity + gravity
+        self.bird_velocity = np.where(alive, velocity, self.bird_velocity)
+        self.bird_y = np.where(alive, self.bird_y + self.bird_velocity, self.bird_y)
+        y = self.bird_y
+
+        shielded = alive & (self.shield_time > 0)
+        self.shield_time[shielded] -= 1
+        self.invincible = np.where(alive, shielded, self.invincible)
+
+        bird_size = bird.BIRD_SIZE
+        over = alive & ((y > bird.HEIGHT - bird.GROUND_HEIGHT - bird_size) | (y < -bird_size))
+
+        # Spawning
+        self.pipe_timer[alive] += 1
+        spawn = alive & (self.pipe_timer > 90)
+        if spawn.any():
+            self.pipe_timer[spawn] = 0
+            rows = self.rows[spawn]
+            slots = self.pipe_count[spawn]
+            max_height = bird.HEIGHT - bird.PIPE_GAP - bird.GROUND_HEIGHT - 120
+            self.pipe_x[rows, slots] = bird.WIDTH
+            self.pipe_height[rows, slots] = rng.integers(120, max_height + 1, len(rows))
+            self.pipe_active[rows, slots] = True
+            self.pipe_scored[rows, slots] = False
+            self.pipe_count[spawn] += 1
+
+            spawn &= rng.random(n) < bird.POWER_UP_CHANCE
+            rows = self.rows[spawn]
+            if len(rows):
+                slots = np.argmin(self.power_up_active[rows], axis=1)
+                self.power_up_x[rows, slots] = bird.WIDTH + 150
+                self.power_up_y[rows, slots] = rng.integers(100, bird.HEIGHT - bird.GROUND_HEIGHT - 100 + 1, len(rows))
+                self.power_up_type[rows, slots] = rng.integers(0, len(bird.POWER_UP_TYPES), len(rows))
+                self.power_up_active[rows, slots] = True
+
+        # Bird collision rect, truncated like pygame.Rect
+        collision_size = bird_size - 5
+        bird_left = bird_x - collision_size
+        bird_right = bird_left + collision_size * 2
+        bird_top = np.trunc(y - collision_size // 2)
+        bird_bottom = bird_top + collision_size
+
+        # Pipes: move, score, collide
+        pipes = self.pipe_active & alive[:, None]
+        self.pipe_x[pipes] -= bird.PIPE_SPEED
+        winter = season_index == 3
+        fog = self.weather == FOG
+        pipe_points = np.where(winter, 2, np.where(fog, 3, 1))
+
+        margin = 3
+        for j in range(self.pipe_slots):
+            active = pipes[:, j]
+            x = self.pipe_x[:, j]
+            scored = active & ~self.pipe_scored[:, j] & (x + bird.PIPE_WIDTH < bird_x)
+            self.pipe_scored[:, j] |= scored
+            points += np.where(scored, pipe_points, 0)
+
+            left = np.trunc(x + margin)
+            right = left + (bird.PIPE_WIDTH - 2 * margin)
+            height = self.pipe_height[:, j]
+            bottom_y = height + bird.PIPE_GAP
+            overlap_x = (bird_left < right) & (left < bird_right)
+            hit_top = (bird_top < height) & (bird_bottom > 0)
+            hit_bottom = (bird_bottom > bottom_y) & (bird_top < bird.HEIGHT - bird.GROUND_HEIGHT)
+            over |= active & ~self.invincible & overlap_x & (hit_top | hit_bottom)
+
+        # Drop pipes that left the screen from the front
+        gone = pipes[:, 0] & (self.pipe_x[:, 0] + bird.PIPE_WIDTH < 0)
+        if gone.any():
+            for array in (self.pipe_x, self.pipe_height, self.pipe_active, self.pipe_scored):
+                array[gone, :-1] = array[gone, 1:]
+            self.pipe_active[gone, -1] = False
+            self.pipe_count[gone] -= 1
+
+        # Power-ups: move, collect
+        power_ups = self.power_up_active & alive[:, None]
+        self.power_up_x[power_ups] -= bird.PIPE_SPEED
+        size = bird.POWER_UP_SIZE
+        left = np.trunc(self.power_up_x - size)
+        top = self.power_up_y - size
+        collected = (power_ups
+                     & (bird_left < left + size * 2) & (left < bird_right)
+                     & (bird_top[:, None] < top + size * 2) & (top < bird_bottom[:, None]))
+        stars = collected & (self.power_up_type == STAR)
+        shields = collected & (self.power_up_type == SHIELD)
+        points += 5 * stars.sum(axis=1)
+        self.shield_time[shields.any(axis=1)] = 300
+        self.power_up_active &= ~(collected | (power_ups & (self.power_up_x + size < 0)))
+
+        self.score += points
+        self.game_over |= over
+        return points, self.game_over
+
+    def season(self, i):
+        return bird.SeasonSystem().seasons[(self.score[i] // 30) % 4]
+
+
+def follow_gap(batch):
+    # Simple bot: flap when falling below the middle of the next gap
+    bird_x = bird.WIDTH // 4
+    ahead = batch.pipe_active & (batch.pipe_x + bird.PIPE_WIDTH > bird_x - 20)
+    first = np.argmax(ahead, axis=1)
+    height = batch.pipe_height[batch.rows, first]
+    target = np.where(ahead.any(axis=1), height + bird.PIPE_GAP - 40, bird.HEIGHT / 2)
+    return (batch.bird_y > target) & (batch.bird_velocity >= 0)
+
+
+def compare_with_scalar(n=64, steps=20000, seed=0):
+    # Runs n scalar Simulations in lock step with a batch of n games and
+    # checks they agree. Random draws (pipe heights, power-ups, weather) are
+    # copied from the batch into the scalar games after every step, and snow
+    # jitter is switched off so the remaining rules are fully deterministic.
+    jitter = bird.SNOW_JITTER_CHANCE
+    bird.SNOW_JITTER_CHANCE = 0
+    try:
+        random.seed(seed)
+        batch = BatchSimulation(n, seed)
+        sims = [bird.Simulation() for _ in range(n)]
+        for sim in sims:
+            sim.weather_timer = -10 ** 9
+        for _ in range(steps):
+            flap = follow_gap(batch)
+            batch.step(flap)
+            for i, sim in enumerate(sims):
+                if sim.game_over:
+                    continue
+                sim.weather.weather_type = bird.WEATHER_TYPES[batch.weather[i]]
+                sim.step(bool(flap[i]))
+                pipe_count = len(sim.pipes)
+                if pipe_count and sim.pipe_timer == 0:
+                    sim.pipes[-1].height = int(batch.pipe_height[i, pipe_count - 1])
+                sim.power_ups = [
+                    bird.PowerUp(batch.power_up_x[i, j], int(batch.power_up_y[i, j]),
+                                 bird.POWER_UP_TYPES[batch.power_up_type[i, j]])
+                    for j in np.flatnonzero(batch.power_up_active[i])
+                ]
+                assert abs(sim.bird.y - batch.bird_y[i]) < 1e-6, (i, sim.bird.y, batch.bird_y[i])
+                assert abs(sim.bird.velocity - batch.bird_velocity[i]) < 1e-6
+                assert sim.score == batch.score[i], (i, sim.score, batch.score[i])
+                assert sim.game_over == batch.game_over[i], (i, sim.frame)
+                assert sim.bird.shield_time == batch.shield_time[i]
+                assert [p.x for p in sim.pipes] == list(batch.pipe_x[i, :pipe_count])
+            done = batch.game_over.copy()
+            if done.all():
+                batch.reset()
+                for sim in sims:
+                    sim.reset()
+                    sim.weather_timer = -10 ** 9
+    finally:
+        bird.SNOW_JITTER_CHANCE = jitter
+
+
+if __name__ == '__main__':
+    import time
+
+    compare_with_scalar()
+    print('batch engine matches bird.Simulation')
+
+    batch = BatchSimulation(4096, seed=1)
+    start = time.perf_counter()
+    steps = 500
+    for _ in range(steps):
+        batch.step(follow_gap(batch))
+        batch.reset(batch.game_over)
+    elapsed = time.perf_counter() - start
+    print(f'{batch.n * steps / elapsed:,.0f} game steps/s across {batch.n} games')
@@ -0,0 +1,153 @@
+import numpy as np
+import pygame
+
+import bird
+
+# Gym-style wrapper around bird.Simulation for training agents:
+#
+#   env = FlappyEnv()
+#   observation = env.reset(seed=0)
+#   while True:
+#       observation, reward, done, info = env.step(agent(observation))
+#       if done:
+#           break
+#
+# The action is 0 (do nothing) or 1 (flap). Observations are either a
+# feature vector (observation='features') or the rendered frame
+# (observation='pixels').
+
+ALIVE_REWARD = 0.1  # Per simulated frame survived
+DEATH_REWARD = -1.0
+
+PIPES_AHEAD = 2
+POWER_UPS_AHEAD = 2
+
+FEATURE_NAMES = (
+    ['bird_y', 'bird_velocity', 'shield_time']
+    + [f'pipe{i}_{name}' for i in range(PIPES_AHEAD) for name in ('dx', 'gap_top')]
+    + [f'power_up{i}_{name}' for i in range(POWER_UPS_AHEAD) for name in ('dx', 'y', 'star', 'shield')]
+    + [f'season_{season}' for season in bird.SeasonSystem().seasons]
+    + [f'weather_{kind}' for kind in bird.WEATHER_TYPES]
+)
+
+
+class FlappyEnv:
+    def __init__(self, observation='features', frame_skip=1, downscale=1, max_frames=None):
+        if observation not in ('features', 'pixels'):
+            raise ValueError(f"observation must be 'features' or 'pixels', not {observation!r}")
+        self.observation = observation
+        self.frame_skip = frame_skip
+        self.downscale = downscale
+        self.max_frames = max_frames
+        self.sim = bird.Simulation()
+        self.seasons = {season: i for i, season in enumerate(bird.SeasonSystem().seasons)}
+        self.weathers = {kind: i for i, kind in enumerate(bird.WEATHER_TYPES)}
+
+        if observation == 'pixels':
+            if bird.font is None:
+                bird.init_fonts()
+            # The surface draws straight into this array, so the observation
+            # is a view of the rendered frame: nothing is copied or locked.
+            # BGRA matches the pixel layout of the cached sprites, which keeps
+            # blits on SDL's fast path; the view reorders it to RGB.
+            # Downscaling is nearest-neighbour by striding over the same view.
+            self.frame = np.zeros((bird.HEIGHT, bird.WIDTH, 4), dtype=np.uint8)
+            self.surface = pygame.image.frombuffer(self.frame, (bird.WIDTH, bird.HEIGHT), 'BGRA')
+            self.pixels = self.frame[::downscale, ::downscale, 2::-1]
+            self.renderer = bird.Renderer(self.surface)
+            self.game_state = bird.GameState()
+
+    @property
+    def observation_shape(self):
+        if self.observation == 'pixels':
+            return self.pixels.shape
+        return (len(FEATURE_NAMES),)
+
+    def reset(self, seed=None):
+        self.sim.reset(seed)
+        if self.observation == 'pixels':
+            self.renderer.reset(self.sim.seed)
+        return self.observe()
+
+    def step(self, action):
+        # Flapping is an impulse, so it applies to the first skipped frame only
+        sim = self.sim
+        reward = 0.0
+        flap = bool(action)
+        for _ in range(self.frame_skip):
+            score = sim.score
+            events = sim.step(flap)
+            flap = False
+            reward += sim.score - score
+            reward += DEATH_REWARD if sim.game_over else ALIVE_REWARD
+            if self.observation == 'pixels':
+                for event in events:
+                    self.renderer.handle_event(event)
+                self.renderer.update(sim)
+            if sim.game_over:
+                break
+
+        truncated = self.max_frames is not None and sim.frame >= self.max_frames
+        info = {'score': sim.score, 'frame': sim.frame, 'truncated': truncated}
+        return self.observe(), reward, sim.game_over or truncated, info
+
+    def observe(self):
+        if self.observation == 'pixels':
+            # Valid until the next step or reset draws over it; copy it to keep it
+            self.renderer.draw_frame(self.sim, self.game_state)
+            return self.pixels
+        return self.features()
+
+    def features(self):
+        sim = self.sim
+        b = sim.bird
+        values = np.zeros(len(FEATURE_NAMES), dtype=np.float32)
+        values[0] = b.y / bird.HEIGHT
+        values[1] = b.velocity / 10
+        values[2] = b.shield_time / 300
+
+        # Pipes and power-ups the bird has not passed yet, nearest first;
+        # empty slots read as "far away"
+        i = 3
+        ahead = [pipe for pipe in sim.pipes if pipe.x + bird.PIPE_WIDTH > b.x][:PIPES_AHEAD]
+        for slot in range(PIPES_AHEAD):
+            if slot < len(ahead):
+                values[i] = (ahead[slot].x - b.x) / bird.WIDTH
+                values[i + 1] = ahead[slot].height / bird.HEIGHT
+            else:
+                values[i] = 1.0
+            i += 2
+
+        ahead = sorted((p for p in sim.power_ups if p.x + bird.POWER_UP_SIZE > b.x), key=lambda p: p.x)
+        for slot in range(POWER_UPS_AHEAD):
+            if slot < len(ahead):
+                power_up = ahead[slot]
+                values[i] = (power_up.x - b.x) / bird.WIDTH
+                values[i + 1] = power_up.y / bird.HEIGHT
+                values[i + 2] = power_up.power_type == 'star'
+                values[i + 3] = power_up.power_type == 'shield'
+            else:
+                values[i] = 1.0
+            i += 4
+
+        values[i + self.seasons[sim.season_system.current_season]] = 1.0
+        i += len(self.seasons)
+        values[i + self.weathers[sim.weather.weather_type]] = 1.0
+        return values
+
+
+if __name__ == '__main__':
+    import time
+
+    for observation in ('features', 'pixels'):
+        env = FlappyEnv(observation, frame_skip=4, downscale=2)
+        env.reset(seed=0)
+        start = time.perf_counter()
+        steps = 0
+        while steps < 2000:
+            _, _, done, _ = env.step(np.random.random() < 0.1)
+            steps += 1
+            if done:
+                env.reset()
+        elapsed = time.perf_counter() - start
+        print(f'{observation:>8}: {steps / elapsed:,.0f} steps/s, observation shape {env.observation_shape}')
@@ -0,0 +1,350 @@
+import argparse
+import asyncio
+import struct
+import sys
+import threading
+import weakref
+
+import pygame
+
+import bird
+
+# Live spectating over local TCP or Unix sockets. The game broadcasts the
+# world after every simulation step; viewers mirror it into a Simulation and
+# draw it with the normal Renderer:
+#
+#   python bird.py --serve 127.0.0.1:8765
+#   python spectator.py 127.0.0.1:8765
+#
+# Every KEYFRAME_INTERVAL steps a keyframe carries the whole world. In
+# between, each message carries only the fields that differ from the last
+# keyframe (not from the previous message), so a viewer that falls behind can
+# skip messages and a new viewer only needs the keyframe and the latest delta.
+
+KEYFRAME_INTERVAL = 60
+MAX_VIEWER_BUFFER = 64 * 1024  # Deltas are skipped for viewers this far behind
+MAX_VIEWER_BACKLOG = 16 * MAX_VIEWER_BUFFER  # Viewers this far behind are disconnected
+DEFAULT_PORT = 8765
+
+KEYFRAME, DELTA = b'K', b'D'
+WORLD, BIRD, PIPE, POWER_UP = range(4)
+
+# Field formats of each kind of entity:
+#   world:    frame, score, game over, season, weather, weather intensity, time of day
+#   bird:     y, wing angle, body tilt, invincible
+#   pipe:     x, height
+#   power-up: x, y, type, bob offset, bob timer
+FIELDS = {
+    WORLD: 'Iq?BBff',
+    BIRD: 'fqf?',
+    PIPE: 'fH',
+    POWER_UP: 'ffBff',
+}
+FRAMING = struct.Struct('<I')
+MESSAGE_HEADER = struct.Struct('<cHH')
+ENTITY = struct.Struct('<BIB')
+REMOVED = struct.Struct('<BI')
+
+
+def encode(kind, state, base):
+    # Entities and fields of state that differ from base, plus the keys of
+    # entities that disappeared. A keyframe is simply a delta against nothing.
+    entries = []
+    for (entity_kind, entity_id), values in state.items():
+        old = base.get((entity_kind, entity_id))
+        if old == values:
+            continue
+        formats = FIELDS[entity_kind]
+        mask = 0
+        changed = []
+        for i, value in enumerate(values):
+            if old is None or old[i] != value:
+                mask |= 1 << i
+                changed.append(i)
+        entries.append(ENTITY.pack(entity_kind, entity_id, mask)
+                       + struct.pack('<' + ''.join(formats[i] for i in changed), *[values[i] for i in changed]))
+    removed = [REMOVED.pack(*key) for key in base if key not in state]
+    message = b''.join([MESSAGE_HEADER.pack(kind, len(entries), len(removed)), *entries, *removed])
+    return FRAMING.pack(len(message)) + message
+
+
+def decode(message, base):
+    kind, entry_count, removed_count = MESSAGE_HEADER.unpack_from(message)
+    state = {} if kind == KEYFRAME else dict(base)
+    offset = MESSAGE_HEADER.size
+    for _ in range(entry_count):
+        entity_kind, entity_id, mask = ENTITY.unpack_from(message, offset)
+        offset += ENTITY.size
+        formats = FIELDS[entity_kind]
+        changed = [i for i in range(len(formats)) if mask >> i & 1]
+        layout = struct.Struct('<' + ''.join(formats[i] for i in changed))
+        new_values = layout.unpack_from(message, offset)
+        offset += layout.size
+
+        values = list(state.get((entity_kind, entity_id), (0,) * len(formats)))
+        for i, value in zip(changed, new_values):
+            values[i] = value
+        state[entity_kind, entity_id] = tuple(values)
+    for _ in range(removed_count):
+        state.pop(REMOVED.unpack_from(message, offset), None)
+        offset += REMOVED.size
+    return kind, state
+
+
+def round_float(value):
+    # Floats travel as float32; comparing the rounded values keeps
+    # "unchanged" exact on both ends
+    return struct.unpack('<f', struct.pack('<f', value))[0]
+
+
+class Broadcaster:
+    # Serves viewers from an asyncio loop on its own thread. The game loop
+    # only captures and encodes the world in publish(); all socket work
+    # happens on the server thread, once per message for every viewer.
+    def __init__(self, address):
+        # Parsed here so a bad address raises in the caller, not on the thread
+        self.kind, self.target = parse_address(address)
+        self.ids = weakref.WeakKeyDictionary()
+        self.next_id = 0
+        self.base = {}
+        self.steps = 0
+        self.keyframe = None
+        self.latest = None
+        self.writers = set()
+        self.skipped = 0
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(ready,), name='spectator-server', daemon=True)
+        self.thread.start()
+        ready.wait()
+        if self.error:
+            raise self.error
+
+    def run(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.error = None
+        try:
+            if self.kind == 'unix':
+                start = asyncio.start_unix_server(self.serve, path=self.target)
+            else:
+                start = asyncio.start_server(self.serve, *self.target)
+            self.server = self.loop.run_until_complete(start)
+        except Exception as error:
+            # Handed to __init__, which would otherwise wait forever
+            self.error = error
+            return
+        finally:
+            ready.set()
+        self.loop.run_forever()
+
+    def entity_id(self, obj):
+        entity_id = self.ids.get(obj)
+        if entity_id is None:
+            entity_id = self.ids[obj] = self.next_id
+            self.next_id += 1
+        return entity_id
+
+    def capture(self, sim):
+        b = sim.bird
+        state = {
+            (WORLD, 0): (sim.frame, sim.score, sim.game_over, sim.season_system.season_index,
+                         bird.WEATHER_TYPES.index(sim.weather.weather_type),
+                         round_float(sim.weather.weather_intensity), round_float(sim.time_system.time_of_day)),
+            (BIRD, 0): (round_float(b.y), b.wing_angle, round_float(b.body_tilt), b.invincible),
+        }
+        for pipe in sim.pipes:
+            state[PIPE, self.entity_id(pipe)] = (round_float(pipe.x), pipe.height)
+        for power_up in sim.power_ups:
+            state[POWER_UP, self.entity_id(power_up)] = (
+                round_float(power_up.x), round_float(power_up.y), bird.POWER_UP_TYPES.index(power_up.power_type),
+                round_float(power_up.bob_offset), round_float(power_up.bob_timer))
+        return state
+
+    def publish(self, sim):
+        state = self.capture(sim)
+        if self.steps % KEYFRAME_INTERVAL == 0:
+            message = encode(KEYFRAME, state, {})
+            self.base = state
+        else:
+            message = encode(DELTA, state, self.base)
+        self.steps += 1
+        self.loop.call_soon_threadsafe(self.send, message)
+
+    def send(self, message):
+        if message[FRAMING.size:FRAMING.size + 1] == KEYFRAME:
+            self.keyframe = message
+        self.latest = message
+        for writer in list(self.writers):
+            if writer.is_closing():
+                self.writers.discard(writer)
+            elif writer.transport.get_write_buffer_size() > MAX_VIEWER_BACKLOG:
+                # Stalled for good: keyframes alone would grow its buffer
+                # without end. abort() drops the buffer that close() would
+                # wait to flush.
+                self.writers.discard(writer)
+                writer.transport.abort()
+            elif message is not self.keyframe and writer.transport.get_write_buffer_size() > MAX_VIEWER_BUFFER:
+                # Keyframes always go out; a delta can be skipped because the
+                # next one is again relative to the keyframe
+                self.skipped += 1
+            else:
+                writer.write(message)
+
+    async def serve(self, reader, writer):
+        if self.keyframe:
+            writer.write(self.keyframe)
+            if self.latest is not self.keyframe:
+                writer.write(self.latest)
+        self.writers.add(writer)
+        try:
+            # Viewers never send anything; this just waits for them to leave
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    async def shutdown(self):
+        self.server.close()
+        for writer in self.writers:
+            writer.close()
+        await self.server.wait_closed()
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+def parse_address(address):
+    # 'unix:/path/to.sock', 'host:port' or just 'port'
+    if address.startswith('unix:'):
+        return 'unix', address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    try:
+        port = int(port or DEFAULT_PORT)
+    except ValueError:
+        raise ValueError(f'not a port number in {address!r}') from None
+    return 'tcp', (host or '127.0.0.1', port)
+
+
+class Mirror:
+    # A Simulation that is never stepped, only overwritten with received
+    # states, so the normal Renderer can draw it
+    def __init__(self, renderer):
+        self.sim = bird.Simulation()
+        self.renderer = renderer
+        self.pipes = {}
+        self.power_ups = {}
+
+    def apply(self, state):
+        sim = self.sim
+        b = sim.bird
+        frame, score, game_over, season_index, weather, intensity, time_of_day = state[WORLD, 0]
+        if frame < sim.frame:
+            # The game restarted
+            sim.reset()
+            self.renderer.reset()
+        elif score > sim.score:
+            self.renderer.handle_event(('score', score - sim.score, b.x, b.y))
+
+        sim.frame = frame
+        sim.score = score
+        sim.game_over = game_over
+        sim.season_system.season_index = season_index
+        sim.season_system.current_season = sim.season_system.seasons[season_index]
+        sim.time_system.time_of_day = time_of_day
+        weather_type = bird.WEATHER_TYPES[weather]
+        if weather_type != sim.weather.weather_type:
+            sim.weather.set_weather(weather_type, intensity)
+
+        b.prev_y = b.y
+        b.y, b.wing_angle, b.body_tilt, b.invincible = state[BIRD, 0]
+        b.trail.append((b.x, b.y))
+
+        pipes = {}
+        power_ups = {}
+        for (kind, entity_id), values in sorted(state.items()):
+            if kind == PIPE:
+                pipe = self.pipes.get(entity_id) or bird.Pipe.__new__(bird.Pipe)
+                pipe.x, pipe.height = values
+                pipe.prev_x = pipe.x
+                pipes[entity_id] = pipe
+            elif kind == POWER_UP:
+                power_up = self.power_ups.get(entity_id) or bird.PowerUp.__new__(bird.PowerUp)
+                power_up.x, power_up.y, power_type, power_up.bob_offset, power_up.bob_timer = values
+                power_up.prev_x = power_up.x
+                power_up.collected = False
+                power_up.power_type = bird.POWER_UP_TYPES[power_type]
+                power_ups[entity_id] = power_up
+        self.pipes = pipes
+        self.power_ups = power_ups
+        # Entity ids grow with spawn order, so this is left to right
+        sim.pipes = bird.PipeQueue(pipes.values())
+        sim.power_ups = list(power_ups.values())
+
+
+async def watch(address, fps):
+    kind, target = parse_address(address)
+    if kind == 'unix':
+        reader, writer = await asyncio.open_unix_connection(target)
+    else:
+        reader, writer = await asyncio.open_connection(*target)
+
+    screen = bird.init_display()
+    pygame.display.set_caption('🐦 Flappy Bird spectator 🐦')
+    renderer = bird.Renderer(screen)
+    mirror = Mirror(renderer)
+    game_state = bird.GameState()
+    received = []
+
+    async def receive():
+        base = {}
+        while True:
+            (size,) = FRAMING.unpack(await reader.readexactly(FRAMING.size))
+            message_kind, state = decode(await reader.readexactly(size), base)
+            if message_kind == KEYFRAME:
+                base = state
+            received.append(state)
+
+    receiving = asyncio.create_task(receive())
+    running = True
+    while running and not receiving.done():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        for state in received:
+            mirror.apply(state)
+            renderer.update(mirror.sim)
+        received.clear()
+        renderer.draw(mirror.sim, game_state)
+        renderer.present()
+        await asyncio.sleep(1 / fps)
+
+    if receiving.done():
+        # Only ends by the game closing the connection
+        print(f'The game stopped streaming ({receiving.exception()!r})')
+    else:
+        receiving.cancel()
+    writer.close()
+    pygame.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Watch a game started with bird.py --serve')
+    parser.add_argument('address', nargs='?', default=str(DEFAULT_PORT),
+                        help="'host:port', 'port' or 'unix:/path/to.sock' (default: %(default)s)")
+    parser.add_argument('--fps', type=int, default=60, help='render frame rate')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(watch(args.address, args.fps))
+    except (OSError, ValueError, asyncio.IncompleteReadError) as error:
+        print(f'Lost the game at {args.address}: {error}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
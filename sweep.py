@@ -0,0 +1,194 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+# One banner per worker process is just noise
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import bird
+import bird_batch
+
+# Plays headless games for every combination of difficulty constants, spread
+# over all cores. Each task plays one chunk of games for one combination with
+# the batch engine and the follow_gap bot (or the much stronger, but scalar,
+# autopilot), and sends back only histograms, so per-game data never leaves
+# the worker:
+#
+#   python sweep.py --gravity 0.35 0.4 0.45 --pipe-gap 180 200 --games 4096
+#   python sweep.py --pipe-speed 2.5 3 3.5 --player autopilot --games 256
+#
+# Every combination replays the same chunk seeds, so differences between rows
+# come from the constants rather than from luck.
+
+# (option, bird constant or season, type)
+PARAMETERS = [
+    ('gravity', 'GRAVITY', float),
+    ('jump_strength', 'JUMP_STRENGTH', float),
+    ('pipe_gap', 'PIPE_GAP', int),
+    ('pipe_speed', 'PIPE_SPEED', float),
+    ('power_up_chance', 'POWER_UP_CHANCE', float),
+] + [(f'{season}_gravity', season, float) for season in bird.SEASON_GRAVITY]
+
+SCORE_BINS = 200  # Scores of SCORE_BINS - 1 and up share the last bin
+SURVIVAL_BINS = 300  # Seconds survived, same overflow rule
+
+
+def apply(params):
+    for name, value in params.items():
+        if name in bird.SEASON_GRAVITY:
+            bird.SEASON_GRAVITY[name] = value
+        else:
+            setattr(bird, name, value)
+
+
+def play_follow_gap(games, seed, max_frames):
+    batch = bird_batch.BatchSimulation(games, seed)
+    for _ in range(max_frames):
+        batch.step(bird_batch.follow_gap(batch))
+        if batch.game_over.all():
+            break
+    return batch.score, batch.frame, batch.game_over
+
+
+def play_autopilot(games, seed, max_frames):
+    # One Simulation at a time; the tables are built after apply() so they
+    # follow the swept constants
+    autopilot = bird.Autopilot()
+    score = np.zeros(games, dtype=np.int64)
+    frame = np.zeros(games, dtype=np.int64)
+    game_over = np.zeros(games, dtype=bool)
+    for i, game_seed in enumerate(np.random.SeedSequence(seed).generate_state(games)):
+        sim = bird.Simulation(int(game_seed))
+        while not sim.game_over and sim.frame < max_frames:
+            sim.step(autopilot.should_flap(sim))
+        score[i], frame[i], game_over[i] = sim.score, sim.frame, sim.game_over
+    return score, frame, game_over
+
+
+PLAYERS = {'follow_gap': play_follow_gap, 'autopilot': play_autopilot}
+
+
+def play(task):
+    # Runs in a worker: plays a chunk of games to the end (or max_frames)
+    # and reduces them to histograms
+    index, params, games, seed, max_frames, player = task
+    apply(params)
+    score, frame, game_over = PLAYERS[player](games, seed, max_frames)
+
+    seconds = frame // bird.SIM_HZ
+    return index, {
+        'games': games,
+        'unfinished': int((~game_over).sum()),
+        'score_total': int(score.sum()),
+        'score_max': int(score.max()),
+        'frame_total': int(frame.sum()),
+        'scores': np.bincount(np.minimum(score, SCORE_BINS - 1), minlength=SCORE_BINS),
+        'survival': np.bincount(np.minimum(seconds, SURVIVAL_BINS - 1), minlength=SURVIVAL_BINS),
+    }
+
+
+def merge(total, part):
+    if total is None:
+        return part
+    for key, value in part.items():
+        total[key] = max(total[key], value) if key == 'score_max' else total[key] + value
+    return total
+
+
+def percentile(histogram, q):
+    return int(np.searchsorted(np.cumsum(histogram), q * histogram.sum()))
+
+
+def summarize(params, stats):
+    games = stats['games']
+    return {
+        'params': params,
+        'games': games,
+        'unfinished': stats['unfinished'],
+        'score_mean': stats['score_total'] / games,
+        'score_p50': percentile(stats['scores'], 0.5),
+        'score_p90': percentile(stats['scores'], 0.9),
+        'score_max': stats['score_max'],
+        'survival_mean_s': stats['frame_total'] / games / bird.SIM_HZ,
+        'survival_p50_s': percentile(stats['survival'], 0.5),
+        'score_histogram': stats['scores'].tolist(),
+        'survival_histogram': stats['survival'].tolist(),
+    }
+
+
+def grid(args):
+    names = [name for _, name, _ in PARAMETERS]
+    values = [getattr(args, option) for option, _, _ in PARAMETERS]
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+def format_row(result):
+    params = ' '.join(f'{value:>7g}' for value in result['params'].values())
+    return (f'{params} | {result["score_mean"]:7.1f} {result["score_p50"]:5d} {result["score_p90"]:5d} '
+            f'{result["score_max"]:5d} {result["survival_mean_s"]:7.1f} {result["unfinished"]:6d}')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Sweep difficulty constants over many bot-played headless games')
+    for option, name, kind in PARAMETERS:
+        default = bird.SEASON_GRAVITY[name] if name in bird.SEASON_GRAVITY else getattr(bird, name)
+        parser.add_argument('--' + option.replace('_', '-'), type=kind, nargs='+', default=[default],
+                            metavar='VALUE', help=f'values of {name} to try (default {default})')
+    parser.add_argument('--player', choices=PLAYERS, default='follow_gap',
+                        help='bot playing the games (default: %(default)s)')
+    parser.add_argument('--games', type=int, default=2048, help='games per combination')
+    parser.add_argument('--chunk', type=int, default=512, help='games per task handed to a worker')
+    parser.add_argument('--max-frames', type=int, default=bird.SIM_HZ * 300,
+                        help='stop games still running after this many frames (counted as unfinished)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes (default: all cores)')
+    parser.add_argument('--seed', type=int, default=0, help='seed shared by every combination')
+    parser.add_argument('--output', metavar='PATH', help='save every combination with its histograms as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    combinations = grid(args)
+    tasks = []
+    for index, params in enumerate(combinations):
+        for chunk, start in enumerate(range(0, args.games, args.chunk)):
+            games = min(args.chunk, args.games - start)
+            tasks.append((index, params, games, [args.seed, chunk], args.max_frames, args.player))
+    remaining = [0] * len(combinations)
+    for index, *_ in tasks:
+        remaining[index] += 1
+
+    print(f'{len(combinations)} combinations x {args.games} games on {args.workers} workers')
+    print(' '.join(f'{name[:7]:>7}' for _, name, _ in PARAMETERS)
+          + ' |    mean   p50   p90   max  mean_s  unfin')
+
+    totals = [None] * len(combinations)
+    results = [None] * len(combinations)
+    start = time.perf_counter()
+    with Pool(args.workers) as pool:
+        # Chunks come back as soon as they finish; a combination is printed
+        # once its last chunk is in
+        for index, stats in pool.imap_unordered(play, tasks):
+            totals[index] = merge(totals[index], stats)
+            remaining[index] -= 1
+            if not remaining[index]:
+                results[index] = summarize(combinations[index], totals[index])
+                print(format_row(results[index]), flush=True)
+    elapsed = time.perf_counter() - start
+    frames = sum(result['survival_mean_s'] * result['games'] * bird.SIM_HZ for result in results)
+    print(f'{len(combinations) * args.games} games in {elapsed:.1f}s ({frames / elapsed:,.0f} game steps/s)')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())